@@ -0,0 +1,454 @@
+"""
+Benchmarks for the ingestion and statistics hot paths.
+
+For each scale, synthetic exports (benchmarks/synthetic_data.py) are written
+to a scratch workspace laid out like the repo (data/*.csv, db/), then:
+
+- `load_and_clean` (plain and `compact=True`) runs on each export
+- data_marts_create.py builds check_marts.db: full, chunked, and an
+  incremental refresh with nothing new
+- the join queries from notebooks/exploratory_data_analysis.ipynb run
+  against the built marts
+- the metrics service loads trader_metrics and answers assistant tool calls
+- each IndependentGroupsAnalysis method runs on the notebook's handle-time
+  comparison (Invoice amount query vs Lead Volume phone calls)
+
+Every benchmark is timed over `--repeat` runs, then run once more under
+tracemalloc for its peak traced allocation (NumPy and pandas buffers
+included; SQLite's own memory is not). Results go to a JSON file; pass an
+earlier file as `--baseline` to list the benchmarks that got slower or
+bigger, with a non-zero exit if any did.
+
+    python -m benchmarks.run_benchmarks --scales 1 10 100 --output benchmarks/results/latest.json
+    python -m benchmarks.run_benchmarks --scales 1 --baseline benchmarks/results/latest.json
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.synthetic_data import write_tables  # noqa: E402
+from src.metrics_service import TraderMetricsService, lead_diagnostics  # noqa: E402
+from utils.data_processors import load_and_clean  # noqa: E402
+from utils.inferential_statistics import IndependentGroupsAnalysis  # noqa: E402
+
+TABLES = ("phone", "cases", "salesforce_omni_channel", "whatsapp")
+
+# Join queries from notebooks/exploratory_data_analysis.ipynb
+NOTEBOOK_QUERIES = {
+    "whatsapp_by_issue_type": """
+        SELECT
+            c.issue_type,
+            COUNT(w.case_id) AS wa_sessions,
+            AVG(w.agent_message_count) AS avg_agent_messages,
+            SUM(CASE WHEN w.agent_type = 'Agent' THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS agent_handled_rate
+        FROM whatsapp w
+        LEFT JOIN cases c ON w.case_id = c.id
+        GROUP BY 1
+        ORDER BY wa_sessions DESC, avg_agent_messages DESC
+    """,
+    "whatsapp_by_origin": """
+        SELECT c.origin, COUNT(*) AS session_count
+        FROM whatsapp w
+        JOIN cases c ON w.case_id = c.id
+        GROUP BY 1
+        ORDER BY 2 DESC
+    """,
+    "omni_by_origin_issue_type": """
+        SELECT c.origin, c.issue_type, COUNT(*) AS cases
+        FROM salesforce_omni_channel o
+        INNER JOIN cases c ON o.work_item_id = c.id
+        GROUP BY 1, 2
+        ORDER BY 3 DESC
+    """,
+    "phone_handle_time_by_issue_type": """
+        SELECT c.issue_type, AVG(p.handle_time), COUNT(*) AS cases
+        FROM phone AS p
+        INNER JOIN cases AS c ON p.session_id = c.session_id
+        GROUP BY 1
+        ORDER BY 3 DESC, 2 DESC
+    """,
+    "phone_top_issues": """
+        SELECT c.issue_type, p.handle_time
+        FROM phone AS p
+        INNER JOIN cases AS c ON p.session_id = c.session_id
+        WHERE c.issue_type IN ('Lead Volume - Not enough leads', 'Invoice amount query')
+    """,
+    "whatsapp_cases_omni_non_bot": """
+        SELECT w.*, c.*, s.*
+        FROM whatsapp AS w
+        INNER JOIN cases AS c ON w.case_id = c.id
+        INNER JOIN salesforce_omni_channel AS s ON s.work_item_id = c.id
+        WHERE w.agent_type != 'Bot'
+    """,
+    "omni_routing_by_queue": """
+        WITH routing_counts AS (
+            SELECT work_item_id, COUNT(*) AS routing_count
+            FROM salesforce_omni_channel
+            GROUP BY work_item_id
+        ),
+        queue_summary AS (
+            SELECT queue_name, work_item_id
+            FROM salesforce_omni_channel
+            GROUP BY queue_name, work_item_id
+        )
+        SELECT
+            q.queue_name,
+            COUNT(q.work_item_id) AS unique_work_items,
+            SUM(r.routing_count) AS total_routing_events,
+            ROUND(AVG(r.routing_count), 2) AS avg_routing_events_per_item,
+            ROUND(100.0 * SUM(CASE WHEN r.routing_count > 1 THEN 1 ELSE 0 END) / COUNT(q.work_item_id), 1) AS pct_multi_touch_items
+        FROM queue_summary q
+        JOIN routing_counts r ON q.work_item_id = r.work_item_id
+        GROUP BY q.queue_name
+        ORDER BY unique_work_items DESC
+    """,
+    "whatsapp_routing_by_queue": """
+        WITH routing_counts AS (
+            SELECT work_item_id, COUNT(*) AS routing_count
+            FROM salesforce_omni_channel
+            GROUP BY work_item_id
+        ),
+        queue_summary AS (
+            SELECT queue_name, work_item_id
+            FROM salesforce_omni_channel
+            GROUP BY queue_name, work_item_id
+        ),
+        linked_cases AS (
+            SELECT w.id AS whatsapp_id, c.id AS case_id, q.queue_name, r.routing_count
+            FROM whatsapp w
+            JOIN cases c ON w.case_id = c.id
+            JOIN queue_summary q ON c.id = q.work_item_id
+            JOIN routing_counts r ON q.work_item_id = r.work_item_id
+        )
+        SELECT
+            queue_name,
+            COUNT(DISTINCT case_id) AS whatsapp_cases,
+            ROUND(AVG(routing_count), 2) AS avg_routing_events_per_case
+        FROM linked_cases
+        GROUP BY queue_name
+        ORDER BY whatsapp_cases DESC
+    """,
+    "profile_text_cases_omni": """
+        SELECT *
+        FROM cases AS c
+        INNER JOIN salesforce_omni_channel AS s ON c.id = s.work_item_id
+        WHERE c.issue_type = 'Profile Text'
+        GROUP BY 1
+    """,
+}
+
+
+def measure(fn, repeat: int = 3, memory: bool = True) -> dict:
+    """
+    Time `fn` over `repeat` runs, then run it once under tracemalloc for its
+    peak traced allocation. Output printed by `fn` is discarded.
+
+    Returns:
+        dict: seconds (min, median, mean, runs) and peak_mb (None if not measured).
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        peak_mb = None
+        if memory:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                fn()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            peak_mb = peak / 1e6
+
+    return {
+        "seconds": {
+            "min": min(times),
+            "median": float(np.median(times)),
+            "mean": float(np.mean(times)),
+            "runs": times,
+        },
+        "peak_mb": peak_mb,
+    }
+
+
+@contextlib.contextmanager
+def _working_directory(path):
+    previous = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _marts_module(workspace):
+    """
+    Import data_marts_create with the workspace as the working directory;
+    the module resolves data/ and db/ against Path.cwd() at import time.
+    """
+    with _working_directory(workspace):
+        sys.modules.pop("src.data_marts_create", None)
+        return importlib.import_module("src.data_marts_create")
+
+
+def _record(results, scale, group, name, fn, repeat, memory, **info) -> None:
+    try:
+        entry = measure(fn, repeat=repeat, memory=memory)
+    except ImportError as error:
+        entry = {"seconds": None, "peak_mb": None, "skipped": str(error)}
+    entry.update({"scale": scale, "group": group, "name": name, **info})
+    results.append(entry)
+
+    if entry["seconds"] is None:
+        print(f"  {group:<8} {name:<48} skipped ({entry['skipped']})")
+    else:
+        peak = f"{entry['peak_mb']:9.1f} MB" if entry["peak_mb"] is not None else ""
+        print(f"  {group:<8} {name:<48} {entry['seconds']['median']:9.3f}s {peak}")
+
+
+def benchmark_scale(scale, workspace, seed=0, repeat=3, memory=True, bootstrap_resamples=2_000) -> list:
+    """
+    Generate one scale's data in `workspace` and run every benchmark on it.
+
+    Returns:
+        list: One result dict per benchmark (scale, group, name, seconds,
+        peak_mb and the row counts involved).
+    """
+    workspace = Path(workspace)
+    data_dir = workspace / "data"
+    (workspace / "db").mkdir(parents=True, exist_ok=True)
+    rows = write_tables(data_dir, scale=scale, seed=seed)
+    print(f"Scale {scale}: " + ", ".join(f"{table} {count:,}" for table, count in rows.items()))
+    results = []
+
+    # Ingestion
+    for table in TABLES:
+        path = data_dir / f"{table}.csv"
+        _record(results, scale, "ingest", f"load_and_clean/{table}",
+                lambda: load_and_clean(path), repeat, memory, rows=rows[table])
+        _record(results, scale, "ingest", f"load_and_clean_compact/{table}",
+                lambda: load_and_clean(path, compact=True), repeat, memory, rows=rows[table])
+
+    # Mart build
+    marts = _marts_module(workspace)
+    db_path = workspace / "db" / "check_marts.db"
+    total_rows = sum(rows.values())
+
+    def build(**options):
+        with _working_directory(workspace):
+            marts.build_marts(db_path=db_path, **options)
+
+    _record(results, scale, "marts", "build_marts/full", build, repeat, memory, rows=total_rows)
+    _record(results, scale, "marts", "build_marts/chunked_50000",
+            lambda: build(chunksize=50_000), repeat, memory, rows=total_rows)
+    _record(results, scale, "marts", "build_marts/incremental_noop",
+            lambda: build(chunksize=50_000, incremental=True), repeat, memory, rows=total_rows)
+
+    # Notebook queries, against a freshly built (indexed) marts database
+    with contextlib.redirect_stdout(io.StringIO()):
+        build()
+    conn = sqlite3.connect(db_path)
+    for name, query in NOTEBOOK_QUERIES.items():
+        result_rows = len(pd.read_sql_query(query, conn))
+        _record(results, scale, "queries", name,
+                lambda: pd.read_sql_query(query, conn), repeat, memory, result_rows=result_rows)
+
+    # Assistant tool calls against the in-memory trader metrics
+    trader_ids = [row[0] for row in conn.execute("SELECT trader_id FROM trader_metrics")]
+    service = TraderMetricsService(db_path)
+    _record(results, scale, "service", "metrics_service/load", service._load, repeat, memory, traders=len(trader_ids))
+
+    def lookups():
+        for i in range(10_000):
+            lead_diagnostics(trader_ids[i % len(trader_ids)], service)
+
+    _record(results, scale, "service", "lead_diagnostics_x10000", lookups, repeat, memory, traders=len(trader_ids))
+
+    # IndependentGroupsAnalysis on the notebook's handle-time comparison
+    phone_top = pd.read_sql_query(NOTEBOOK_QUERIES["phone_top_issues"], conn).dropna()
+    conn.close()
+    group_a = phone_top.loc[phone_top["issue_type"] == "Invoice amount query", "handle_time"].to_numpy()
+    group_b = phone_top.loc[phone_top["issue_type"] == "Lead Volume - Not enough leads", "handle_time"].to_numpy()
+    sizes = {"n_a": len(group_a), "n_b": len(group_b)}
+
+    analyser = IndependentGroupsAnalysis()
+    analyser.load_data(group_a=group_a, group_b=group_b)
+    # The same groups with missing values, which every statistic leaves out
+    with_gaps = IndependentGroupsAnalysis()
+    with_gaps.load_data(
+        group_a=np.concatenate([group_a, np.full(len(group_a) // 4, np.nan)]), group_b=group_b
+    )
+    analyser.test_groups()
+    analyser.test_non_parametric_groups()
+
+    def plot():
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        analyser.plot_distributions()
+        plt.close("all")
+
+    def permutation():
+        import numba  # noqa: F401
+
+        analyser.permutation_test(n_permutations=20_000, early_stop=False, random_state=seed)
+
+    methods = {
+        "load_data": lambda: analyser.load_data(group_a=group_a, group_b=group_b),
+        "test_groups": analyser.test_groups,
+        "test_non_parametric_groups": analyser.test_non_parametric_groups,
+        "summarise": analyser.summarise,
+        "summarise_mu": analyser.summarise_mu,
+        "describe": analyser.describe,
+        "results": analyser.results,
+        "results_mu": analyser.results_mu,
+        f"bootstrap_ci/mean_difference_{bootstrap_resamples}": lambda: analyser.bootstrap_ci(
+            "mean_difference", n_resamples=bootstrap_resamples, random_state=seed
+        ),
+        f"bootstrap_ci/cliffs_delta_{bootstrap_resamples}": lambda: analyser.bootstrap_ci(
+            "cliffs_delta", n_resamples=bootstrap_resamples, random_state=seed
+        ),
+        f"bootstrap_ci/cliffs_delta_nan_{bootstrap_resamples}": lambda: with_gaps.bootstrap_ci(
+            "cliffs_delta", n_resamples=bootstrap_resamples, random_state=seed
+        ),
+        "permutation_test/mean_20000": permutation,
+        "bin_distributions": analyser.bin_distributions,
+        "save_distributions": analyser.save_distributions,
+        "plot_distributions": plot,
+    }
+    for name, method in methods.items():
+        _record(results, scale, "stats", name, method, repeat, memory, **sizes)
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(seed, repeat, memory) -> dict:
+    return {
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "seed": seed,
+        "repeat": repeat,
+        "memory": memory,
+    }
+
+
+def compare(results, baseline, threshold=1.2) -> list:
+    """
+    Benchmarks whose median time or peak memory grew by more than
+    `threshold` times against a baseline run (matched on scale, group, name).
+
+    Returns:
+        list: dicts of scale, group, name, metric, baseline, current and ratio.
+    """
+    previous = {(r["scale"], r["group"], r["name"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["scale"], result["group"], result["name"]))
+        if before is None or result["seconds"] is None or before["seconds"] is None:
+            continue
+        metrics = {
+            "median_seconds": (before["seconds"]["median"], result["seconds"]["median"]),
+            "peak_mb": (before["peak_mb"], result["peak_mb"]),
+        }
+        for metric, (old, new) in metrics.items():
+            if old and new and new / old > threshold:
+                regressions.append({
+                    "scale": result["scale"],
+                    "group": result["group"],
+                    "name": result["name"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": new / old,
+                })
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, mart builds, queries and statistics.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10], help="Data sizes relative to the real exports.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run.")
+    parser.add_argument("--bootstrap-resamples", type=int, default=2_000)
+    parser.add_argument("--output", default=None, help="JSON results file (default: benchmarks/results/<time>.json).")
+    parser.add_argument("--workdir", default=None, help="Scratch directory for data and marts (default: a temp dir).")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory.")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown/growth ratio counted as a regression.")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="check_bench_"))
+    memory = not args.no_memory
+    results = []
+    try:
+        for scale in args.scales:
+            scale = int(scale) if float(scale).is_integer() else scale
+            results += benchmark_scale(
+                scale, workdir, seed=args.seed, repeat=args.repeat, memory=memory,
+                bootstrap_resamples=args.bootstrap_resamples,
+            )
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"environment": environment(args.seed, args.repeat, memory), "results": results}
+    output = Path(args.output) if args.output else (
+        REPO_ROOT / "benchmarks" / "results" / f"{time.strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"✅ Results written to {output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for r in regressions:
+            print(
+                f"❌ {r['name']} (scale {r['scale']}): {r['metric']} "
+                f"{r['baseline']:.3f} -> {r['current']:.3f} ({r['ratio']:.2f}x)"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold}x against {args.baseline}")
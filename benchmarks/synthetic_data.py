@@ -0,0 +1,304 @@
+"""
+Synthetic phone, cases, salesforce_omni_channel and whatsapp exports for
+benchmarking.
+
+The tables use the raw export column names and value formats (Salesforce
+"YYYY-MM-DDTHH:MM:SS.000+0000" timestamps, 18-character ids, "HH:MM:SS"
+phone durations with "-" for missing, AgentWork durations in seconds), so
+they go through exactly the same cleaning paths as the real exports.
+
+WhatsApp distributions follow data/whatsapp.csv (17,956 sessions between
+2024-11-04 and 2025-01-26):
+- Agent Type: Agent 63.6%, Bot 34.8%, System 1.7%
+- Agent Message Count: 0 for 67% of sessions; Agent sessions average ~2
+  messages (long tail to ~40), Bot sessions almost always 0, System always 0
+- Status: Ended 97.3%, Waiting 2.5%, Error/Active/Inactive the rest
+- Case Id: missing for 35%; ~1% of cases have more than one session
+- Accept Time: missing for 1.7%; ~28% accepted within seconds, the rest
+  after a heavy-tailed delay (median ~2.5 hours overall, mean ~19 hours)
+
+The other three exports aren't checked in, so their sizes and mixes are
+plausible guesses, linked to the WhatsApp sessions and to each other through
+the same keys as the real data (whatsapp.case_id -> cases.id,
+cases.session_id -> phone.session_id, omni work_item_id -> cases.id).
+Scale 1 matches the size of the real WhatsApp export, and scale N
+multiplies every table by N over the same date range.
+
+    python -m benchmarks.synthetic_data /tmp/bench/data --scale 10
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+START = np.datetime64("2024-11-04T00:00:00", "s")
+DAYS = 84
+
+# Rows per table at scale 1
+BASE_ROWS = {
+    "whatsapp": 17_956,
+    "cases": 20_000,
+}
+
+WHATSAPP_AGENT_TYPES = {"Agent": 0.6356, "Bot": 0.3477, "System": 0.0167}
+WHATSAPP_STATUSES = {
+    "Ended": 0.9727,
+    "Waiting": 0.0248,
+    "Error": 0.0015,
+    "Active": 0.0009,
+    "Inactive": 0.0001,
+}
+CASE_ORIGINS = {"Web": 0.30, "Phone": 0.36, "Email": 0.26, "Community": 0.08}
+CASE_ISSUE_TYPES = {
+    "Profile Text": 0.22,
+    "Lead Volume - Not enough leads": 0.18,
+    "Invoice amount query": 0.14,
+    "PLI": 0.12,
+    None: 0.34,
+}
+CASE_STATUSES = {"Closed": 0.82, "Approved": 0.10, "New": 0.05, "Escalated": 0.03}
+CALLBACK_REASONS = {"Billing": 0.4, "Profile": 0.35, "Leads": 0.25}
+CALLBACK_TEAMS = {"Membership Advice": 0.7, "Account Management": 0.3}
+CALL_TYPES = {"Inbound": 0.72, "Queue Callback": 0.18, "3rd party transfer": 0.10}
+
+# Share of sessions by hour of day (UTC); contact peaks in working hours
+_HOURLY = np.array(
+    [1, 1, 1, 1, 1, 2, 4, 8, 14, 16, 16, 15, 13, 14, 15, 14, 12, 10, 8, 6, 5, 4, 3, 2],
+    dtype=float,
+)
+
+_BASE62 = np.frombuffer(b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz", np.uint8)
+
+
+def _choice(rng, options: dict, size: int) -> np.ndarray:
+    labels = np.array(list(options), dtype=object)
+    weights = np.array(list(options.values()), dtype=float)
+    return labels[rng.choice(len(labels), size=size, p=weights / weights.sum())]
+
+
+def _salesforce_ids(prefix: str, start: int, count: int) -> np.ndarray:
+    """
+    Unique 18-character ids: a 3-character key prefix ("500" for cases), a
+    fixed org part and a base-62 sequence number, like real Salesforce ids.
+    """
+    numbers = np.arange(start, start + count, dtype=np.int64)
+    digits = np.empty((count, 10), dtype=np.uint8)
+    for position in range(9, -1, -1):
+        digits[:, position] = _BASE62[numbers % 62]
+        numbers //= 62
+    head = np.frombuffer((prefix + "J7").encode(), np.uint8)
+    tail = np.frombuffer(b"IAA", np.uint8)
+    raw = np.hstack([np.tile(head, (count, 1)), digits, np.tile(tail, (count, 1))])
+    return np.ascontiguousarray(raw).view("S18").ravel().astype(str).astype(object)
+
+
+def _timestamps(rng, size: int) -> np.ndarray:
+    """
+    Seconds since START, uniform over the days and weighted by hour of day.
+    """
+    days = rng.integers(0, DAYS, size)
+    hours = rng.choice(24, size=size, p=_HOURLY / _HOURLY.sum())
+    return days * 86_400 + hours * 3_600 + rng.integers(0, 3_600, size)
+
+
+def _format_salesforce(seconds: np.ndarray, missing: np.ndarray = None) -> np.ndarray:
+    text = np.datetime_as_string(START + seconds.astype("timedelta64[s]"), unit="s")
+    out = np.char.add(text, ".000+0000").astype(object)
+    if missing is not None:
+        out[missing] = None
+    return out
+
+
+def _format_hms(seconds: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    seconds = np.minimum(seconds.astype(np.int64), 99 * 3_600 + 3_599)
+    parts = [seconds // 3_600, seconds // 60 % 60, seconds % 60]
+    text = [np.char.zfill(part.astype(str), 2) for part in parts]
+    out = np.char.add(np.char.add(np.char.add(text[0], ":"), np.char.add(text[1], ":")), text[2])
+    out = out.astype(object)
+    out[missing] = "-"
+    return out
+
+
+def _accept_delays(rng, size: int) -> np.ndarray:
+    """
+    Seconds from session creation to acceptance: a share accepted at once,
+    the rest lognormal (fitted to the real median and mean delay).
+    """
+    immediate = rng.random(size) < 0.28
+    minutes = np.where(immediate, rng.uniform(0, 0.05, size), rng.lognormal(5.93, 1.70, size))
+    return np.round(minutes * 60)
+
+
+def _agent_message_counts(rng, agent_types: np.ndarray) -> np.ndarray:
+    size = len(agent_types)
+    # Agent sessions: about half with no agent message, the rest 1 + negative binomial
+    replied = rng.random(size) < 0.52
+    counts = np.where(replied, 1 + rng.negative_binomial(1.5, 1.5 / 4.5, size), 0)
+    counts = np.minimum(counts, 39)
+    bot = agent_types == "Bot"
+    counts[bot] = (rng.random(bot.sum()) < 0.04).astype(int)
+    counts[agent_types == "System"] = 0
+    return counts
+
+
+def generate_tables(scale: float = 1, seed: int = 0) -> dict:
+    """
+    Generate the four raw exports.
+
+    Args:
+        scale (float, optional): Size relative to the real exports. Defaults to 1.
+        seed (int, optional): Random seed; the same (scale, seed) always gives
+            the same tables. Defaults to 0.
+
+    Returns:
+        dict: Table name -> DataFrame with the raw export columns.
+    """
+    rng = np.random.default_rng(seed)
+    n_whatsapp = int(BASE_ROWS["whatsapp"] * scale)
+    n_cases_other = int(BASE_ROWS["cases"] * scale * 0.42)
+
+    # WhatsApp sessions, 65% of them linked to a case
+    created = _timestamps(rng, n_whatsapp)
+    with_case = rng.random(n_whatsapp) >= 0.349
+    n_linked = int(with_case.sum())
+    n_whatsapp_cases = max(1, int(n_linked * 0.99))
+    # Every WhatsApp case has a session; ~1% of sessions re-open an earlier case
+    session_case = np.concatenate([
+        np.arange(n_whatsapp_cases),
+        rng.integers(0, n_whatsapp_cases, n_linked - n_whatsapp_cases),
+    ])
+    rng.shuffle(session_case)
+
+    case_ids = _salesforce_ids("500", 0, n_whatsapp_cases + n_cases_other)
+    agent_types = _choice(rng, WHATSAPP_AGENT_TYPES, n_whatsapp)
+    accept_missing = rng.random(n_whatsapp) < 0.017
+    whatsapp_case_ids = np.full(n_whatsapp, None, dtype=object)
+    whatsapp_case_ids[with_case] = case_ids[session_case]
+
+    whatsapp = pd.DataFrame({
+        "Created Date": _format_salesforce(created),
+        "Id": _salesforce_ids("0Mw", 0, n_whatsapp),
+        "Accept Time": _format_salesforce(created + _accept_delays(rng, n_whatsapp), accept_missing),
+        "Agent Type": agent_types,
+        "Agent Message Count": _agent_message_counts(rng, agent_types),
+        "Case Id": whatsapp_case_ids,
+        "Channel Name": "Inbound Messaging",
+        "Status": _choice(rng, WHATSAPP_STATUSES, n_whatsapp),
+    })
+
+    # Cases: one per WhatsApp case (created just after its first session), plus other origins
+    first_session = np.full(n_whatsapp_cases, np.iinfo(np.int64).max)
+    np.minimum.at(first_session, session_case, created[with_case])
+    case_created = np.concatenate([
+        first_session + rng.integers(1, 120, n_whatsapp_cases),
+        _timestamps(rng, n_cases_other),
+    ])
+    n_cases = len(case_ids)
+    origins = np.concatenate([
+        np.full(n_whatsapp_cases, "WhatsApp", dtype=object),
+        _choice(rng, CASE_ORIGINS, n_cases_other),
+    ])
+    is_phone = origins == "Phone"
+    has_session = is_phone | (rng.random(n_cases) < 0.05)
+    session_ids = np.full(n_cases, None, dtype=object)
+    session_ids[has_session] = np.char.add("S", (10_000_000 + np.arange(has_session.sum())).astype(str))
+    callback = is_phone & (rng.random(n_cases) < 0.4)
+    callback_reasons = np.full(n_cases, None, dtype=object)
+    callback_reasons[callback] = _choice(rng, CALLBACK_REASONS, callback.sum())
+    callback_teams = np.full(n_cases, None, dtype=object)
+    callback_teams[callback] = _choice(rng, CALLBACK_TEAMS, callback.sum())
+    trader_ids = rng.integers(100_000, 100_000 + max(1, int(6_000 * scale)), n_cases).astype(float)
+    trader_ids[rng.random(n_cases) < 0.03] = np.nan
+
+    cases = pd.DataFrame({
+        "Created Date": _format_salesforce(case_created),
+        "Id": case_ids,
+        "Case Number": 500_000 + np.arange(n_cases),
+        "Origin": origins,
+        "Status": _choice(rng, CASE_STATUSES, n_cases),
+        "Issue Type": _choice(rng, CASE_ISSUE_TYPES, n_cases),
+        "Session Id": session_ids,
+        "Trader Id": trader_ids,
+        "Callback Reason": callback_reasons,
+        "Team Taking Callback": callback_teams,
+    }).sort_values("Created Date", kind="stable", ignore_index=True)
+
+    # Phone: a call for every case session, plus 20% calls that never became a case
+    case_sessions = session_ids[has_session]
+    n_unlinked = int(len(case_sessions) * 0.2)
+    call_sessions = np.concatenate([
+        case_sessions,
+        np.char.add("S", (90_000_000 + np.arange(n_unlinked)).astype(str)).astype(object),
+    ])
+    n_calls = len(call_sessions)
+    call_created = np.concatenate([
+        case_created[has_session] - rng.integers(60, 1_800, len(case_sessions)),
+        _timestamps(rng, n_unlinked),
+    ])
+    call_types = _choice(rng, CALL_TYPES, n_calls)
+    handle = rng.lognormal(np.log(480), 0.8, n_calls)
+    phone = pd.DataFrame({
+        "Session Id": call_sessions,
+        "Campaign": np.where(rng.random(n_calls) < 0.97, "MAT - Membership Advice", "MAT - Sales"),
+        "Call Type": call_types,
+        "Handle Time": _format_hms(handle, rng.random(n_calls) < 0.05),
+        "Speed Of Answer": _format_hms(rng.lognormal(np.log(45), 1.0, n_calls), rng.random(n_calls) < 0.02),
+        "Call Date Time": _format_salesforce(np.maximum(call_created, 0)),
+    })
+
+    # Omni-channel routing events for the non-phone cases, ~1.3 per work item
+    routed = np.flatnonzero(~is_phone)
+    events = rng.geometric(0.77, len(routed))
+    work_items = np.repeat(routed, events)
+    n_events = len(work_items)
+    event_created = case_created[work_items] + rng.integers(0, 6 * 3_600, n_events)
+    speed = np.round(rng.lognormal(np.log(600), 1.6, n_events))
+    handle = np.round(rng.lognormal(np.log(420), 1.0, n_events))
+    queue = np.where(origins[work_items] == "WhatsApp", "Messaging Queue", "Membership Advice Case Queue")
+    omni = pd.DataFrame({
+        "Created Date": _format_salesforce(event_created),
+        "Work Item Id": case_ids[work_items],
+        "Speed To Answer": speed,
+        "Handle Time": handle,
+        "Status": np.where(rng.random(n_events) < 0.85, "Closed", "Unavailable"),
+        "Queue Name": queue,
+        "Close Date Time": _format_salesforce(event_created + speed + handle),
+        "Assigned Date Time": _format_salesforce(event_created + speed),
+    }).sort_values("Created Date", kind="stable", ignore_index=True)
+
+    return {
+        "phone": phone,
+        "cases": cases,
+        "salesforce_omni_channel": omni,
+        "whatsapp": whatsapp.sort_values("Created Date", kind="stable", ignore_index=True),
+    }
+
+
+def write_tables(directory, scale: float = 1, seed: int = 0) -> dict:
+    """
+    Generate the exports and write them as `<table>.csv` in `directory`, the
+    file names data_marts_create.py reads.
+
+    Returns:
+        dict: Table name -> rows written.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rows = {}
+    for table, df in generate_tables(scale, seed).items():
+        df.to_csv(directory / f"{table}.csv", index=False)
+        rows[table] = len(df)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic CSV exports for benchmarking.")
+    parser.add_argument("directory", help="Where to write phone.csv, cases.csv, ...")
+    parser.add_argument("--scale", type=float, default=1, help="Size relative to the real exports.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for table, count in write_tables(args.directory, args.scale, args.seed).items():
+        print(f"{table}: {count} rows")
@@ -1,69 +1,10 @@
 import streamlit as st
-from src.summary_client import AISummary
-import openai
-from dotenv import load_dotenv
-import os 
+from src.app_bootstrap import get_summariser, render_header
+from src.profile_prompts import CREATION_SYSTEM_PROMPT, creation_message
 
-load_dotenv()
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-
-# Set up OpenAI client
-openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
-ai_summariser = AISummary(client=openai_client, model="gpt-4o")
-st.markdown("""
-<style>
-/* Simulated Checkatrade-style navbar */
-.checka-header {
-    background-color: #ffffff;
-    border-bottom: 3px solid #0072ce;
-    padding: 0.75rem 1.5rem;
-    font-family: Helvetica, sans-serif;
-    display: flex;
-    align-items: center;
-    justify-content: space-between;
-}
-
-.checka-header .logo {
-    font-weight: bold;
-    font-size: 1.4rem;
-    color: #cc0000;
-}
-
-.checka-header .logo span {
-    color: #0072ce;
-}
-
-.checka-header .nav-links {
-    display: flex;
-    gap: 1.5rem;
-    font-size: 0.9rem;
-}
-
-.checka-header .nav-links a {
-    color: #333333;
-    text-decoration: none;
-}
-
-.checka-header .cta {
-    background-color: #cc0000;
-    color: white;
-    padding: 0.5rem 1rem;
-    font-weight: bold;
-    border-radius: 4px;
-    text-decoration: none;
-}
-</style>
-
-<div class="checka-header">
-    <div class="logo">Check<span>a</span>trade</div>
-    <div class="nav-links">
-        <a href="#">Homeowner</a>
-        <a href="#">Trades</a>
-        <a href="#">Blog</a>
-    </div>
-    <a href="#" class="cta">Trade sign up</a>
-</div>
-""", unsafe_allow_html=True)
+# Built once per server process and shared across reruns and sessions
+ai_summariser = get_summariser("gpt-4o")
+render_header()
 
 # st.title("Generate Your Checkatrade Profile")
 
@@ -121,34 +62,13 @@ keywords = st.text_input("💬 What keywords should be included? (e.g. boiler re
 
 # Submit
 if st.button("🚀 Generate Profile"):
-    system_prompt = """You are an assistant that writes friendly, effective Checkatrade profile descriptions for tradespeople. 
-Follow this structure:
-1. A warm intro that says what they do and where.
-2. A brief story of how they got started and their values.
-3. Experience and qualifications.
-4. A bullet list of services.
-5. Any extras or added value.
-6. A recent job or happy customer quote.
-7. SEO-friendly keywords subtly included.
-The tone should be professional but warm and clear."""
-
-    user_message = f"""
-    Trade: {trade}
-    Location: {location}
-    Intro: {business_intro}
-    Story/Values: {story}
-    Experience: {experience}
-    Qualifications: {qualifications}
-    Services: {services}
-    Added Value: {extra_value}
-    Example Job: {example_job}
-    Review Quote: {review_quote}
-    Keywords: {keywords}
-    """
-
-    with st.spinner("Generating your profile..."):
-        response = ai_summariser.get_response(user_message=user_message, system_prompt=system_prompt)
+    user_message = creation_message(
+        trade, location, business_intro, story, experience, qualifications,
+        services, extra_value, example_job, review_quote, keywords,
+    )
 
     st.markdown("### ✍️ Your Draft Profile")
-    st.success("Here’s your draft profile. Feel free to copy it, edit it, or ask the assistant to revise it.")
-    st.markdown(response)
\ No newline at end of file
+    response = st.write_stream(
+        ai_summariser.stream_response(user_message=user_message, system_prompt=CREATION_SYSTEM_PROMPT)
+    )
+    st.success("Here’s your draft profile. Feel free to copy it, edit it, or ask the assistant to revise it.")
\ No newline at end of file
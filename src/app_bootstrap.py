@@ -0,0 +1,124 @@
+"""
+Shared start-up for the Streamlit apps.
+
+Streamlit re-executes an app script on every interaction, so anything built
+at module level in the script (the OpenAI client and its connection pool, the
+summariser, the response cache) was rebuilt on every rerun. The builders here
+are wrapped in `st.cache_resource`: each runs once per server process and its
+result is shared by every rerun and every session, keeping HTTP keep-alive
+connections and the in-memory cache tier warm. Prompt templates are module
+constants in src/profile_prompts.py, so they are built once on first import.
+"""
+
+import os
+
+import httpx
+import openai
+import streamlit as st
+from dotenv import load_dotenv
+
+from src.profile_revisions import ProfileReviser
+from src.response_cache import ResponseCache
+from src.summary_client import AISummary
+from src.telemetry import setup_logging
+
+# Sized for a handful of concurrent app users streaming completions
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=120)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+HEADER_HTML = """
+<style>
+/* Simulated Checkatrade-style navbar */
+.checka-header {
+    background-color: #ffffff;
+    border-bottom: 3px solid #0072ce;
+    padding: 0.75rem 1.5rem;
+    font-family: Helvetica, sans-serif;
+    display: flex;
+    align-items: center;
+    justify-content: space-between;
+}
+
+.checka-header .logo {
+    font-weight: bold;
+    font-size: 1.4rem;
+    color: #cc0000;
+}
+
+.checka-header .logo span {
+    color: #0072ce;
+}
+
+.checka-header .nav-links {
+    display: flex;
+    gap: 1.5rem;
+    font-size: 0.9rem;
+}
+
+.checka-header .nav-links a {
+    color: #333333;
+    text-decoration: none;
+}
+
+.checka-header .cta {
+    background-color: #cc0000;
+    color: white;
+    padding: 0.5rem 1rem;
+    font-weight: bold;
+    border-radius: 4px;
+    text-decoration: none;
+}
+</style>
+
+<div class="checka-header">
+    <div class="logo">Check<span>a</span>trade</div>
+    <div class="nav-links">
+        <a href="#">Homeowner</a>
+        <a href="#">Trades</a>
+        <a href="#">Blog</a>
+    </div>
+    <a href="#" class="cta">Trade sign up</a>
+</div>
+"""
+
+
+@st.cache_resource
+def get_openai_client() -> openai.OpenAI:
+    """
+    One OpenAI client (and pooled, keep-alive HTTP connections) per process.
+    Loads .env and starts the queued logging on first use; OPENAI_BASE_URL
+    in .env points it at another OpenAI-compatible server.
+    """
+    load_dotenv()
+    setup_logging()
+    return openai.OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        timeout=HTTP_TIMEOUT,
+        http_client=openai.DefaultHttpxClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+    )
+
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    return ResponseCache()
+
+
+@st.cache_resource
+def get_summariser(model: str = "gpt-4o") -> AISummary:
+    """
+    Shared summariser; AISummary reads nothing request-specific back from the
+    instance, so sessions can use it concurrently.
+    """
+    return AISummary(client=get_openai_client(), model=model, cache=get_response_cache())
+
+
+@st.cache_resource
+def get_profile_reviser() -> ProfileReviser:
+    return ProfileReviser(get_summariser("gpt-4o"), router=get_summariser("gpt-4o-mini"))
+
+
+def render_header() -> None:
+    """
+    The Checkatrade-style navbar shown at the top of both apps.
+    """
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
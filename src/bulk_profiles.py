@@ -0,0 +1,211 @@
+"""
+Bulk, offline profile generation for onboarding campaigns.
+
+Reads trade details from a CSV or JSONL file (one row per tradesperson, with
+the creation form's field names), generates a draft profile for each with the
+same system prompt as profile_creation_app.py, and appends one JSON line per
+row to the output file as soon as it completes.
+
+The output file is the checkpoint: on restart, rows already written without
+an error are skipped, so a crash never re-bills completed rows. Responses are
+also kept in the response cache, so a row that completed but was not yet
+written is answered from the cache on resume. Failed rows are retried on the
+next run and appended again, so the last line for an id is the current one.
+
+    python -m src.bulk_profiles data/onboarding.csv data/profiles.jsonl --concurrency 16
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import time
+from pathlib import Path
+
+import openai
+from dotenv import load_dotenv
+
+from src.profile_prompts import CREATION_SYSTEM_PROMPT, creation_message
+from src.response_cache import ResponseCache
+from src.summary_client import AsyncAISummary
+from src.telemetry import setup_logging
+
+# creation_message arguments, read from input columns of the same name
+PROFILE_FIELDS = (
+    "trade",
+    "location",
+    "business_intro",
+    "story",
+    "experience",
+    "qualifications",
+    "services",
+    "extra_value",
+    "example_job",
+    "review_quote",
+    "keywords",
+)
+
+
+def iter_rows(path):
+    """
+    Stream input rows as dicts from a .csv or .jsonl/.json-lines file.
+    """
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def completed_ids(output_path) -> set:
+    """
+    Ids of the rows already generated successfully in an earlier run.
+    """
+    done = set()
+    output_path = Path(output_path)
+    if not output_path.exists():
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash; that row is simply redone
+                continue
+            if record.get("error") is None:
+                done.add(str(record["id"]))
+    return done
+
+
+def _ends_with_newline(path) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) == b"\n"
+
+
+async def _generate(summariser, row_id, row, temperature) -> dict:
+    fields = {name: row.get(name) or "" for name in PROFILE_FIELDS}
+    start = time.perf_counter()
+    try:
+        profile = await summariser.get_response(
+            user_message=creation_message(**fields),
+            system_prompt=CREATION_SYSTEM_PROMPT,
+            temperature=temperature,
+        )
+        error = None
+    except Exception as exc:
+        profile, error = None, repr(exc)
+    return {
+        "id": row_id,
+        "trade": fields["trade"],
+        "location": fields["location"],
+        "profile": profile,
+        "error": error,
+        "latency_s": round(time.perf_counter() - start, 3),
+    }
+
+
+async def generate_profiles(
+    input_path,
+    output_path,
+    summariser,
+    id_column: str = "id",
+    temperature: float = 0.8,
+    max_in_flight: int = 32,
+    report_every: int = 100,
+) -> dict:
+    """
+    Generate a profile for every input row not already in `output_path`.
+
+    Rows are read lazily and at most `max_in_flight` are pending at once, so
+    memory stays flat however large the input; the summariser's own
+    concurrency limit and rate budget bound the API calls.
+
+    Returns:
+    - dict with generated, failed, skipped, seconds and rows_per_minute
+    """
+    done = completed_ids(output_path)
+    counts = {"generated": 0, "failed": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    def write(out, tasks):
+        for task in tasks:
+            record = task.result()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            counts["failed" if record["error"] else "generated"] += 1
+        out.flush()
+        finished = counts["generated"] + counts["failed"]
+        if finished and finished % report_every < len(tasks):
+            minutes = (time.perf_counter() - start) / 60
+            print(f"{finished} rows ({counts['failed']} failed), {finished / minutes:.1f} rows/min")
+
+    pending = set()
+    with open(output_path, "a", encoding="utf-8") as out:
+        if out.tell() and not _ends_with_newline(output_path):
+            # Terminate a line cut short by a crash before appending
+            out.write("\n")
+        for row_number, row in enumerate(iter_rows(input_path)):
+            row_id = str(row.get(id_column) or row_number)
+            if row_id in done:
+                counts["skipped"] += 1
+                continue
+            if len(pending) >= max_in_flight:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                write(out, finished)
+            pending.add(asyncio.create_task(_generate(summariser, row_id, row, temperature)))
+
+        if pending:
+            finished, _ = await asyncio.wait(pending)
+            write(out, finished)
+
+    seconds = time.perf_counter() - start
+    processed = counts["generated"] + counts["failed"]
+    counts["seconds"] = seconds
+    counts["rows_per_minute"] = processed / (seconds / 60) if seconds else 0.0
+    return counts
+
+
+async def _main(args) -> dict:
+    async with openai.AsyncOpenAI(max_retries=0) as client:
+        summariser = AsyncAISummary(
+            client,
+            model=args.model,
+            cache=None if args.no_cache else ResponseCache(),
+            max_concurrency=args.concurrency,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+        )
+        return await generate_profiles(
+            args.input,
+            args.output,
+            summariser,
+            id_column=args.id_column,
+            temperature=args.temperature,
+            max_in_flight=args.concurrency * 4,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate draft profiles in bulk from a CSV or JSONL file.")
+    parser.add_argument("input", help="CSV or JSONL of trade details (creation form field names).")
+    parser.add_argument("output", help="JSONL of generated profiles; also the resume checkpoint.")
+    parser.add_argument("--id-column", default="id", help="Column identifying each row (default: row number).")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--temperature", type=float, default=0.8)
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once.")
+    parser.add_argument("--rpm", type=float, default=500, help="Requests-per-minute budget.")
+    parser.add_argument("--tpm", type=float, default=30_000, help="Tokens-per-minute budget.")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the response cache.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    counts = asyncio.run(_main(args))
+    print(
+        f"✅ {counts['generated']} generated, {counts['failed']} failed, "
+        f"{counts['skipped']} already done in {counts['seconds']:.1f}s "
+        f"({counts['rows_per_minute']:.1f} rows/min) -> {args.output}"
+    )
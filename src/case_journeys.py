@@ -0,0 +1,202 @@
+"""
+Per-case, cross-channel journey table for check_marts.db.
+
+The notebook stitched channels together with a separate join per question
+(WhatsApp on case_id, phone on session_id, omni on work_item_id). Here each
+channel is read once, aggregated per case with a hash group-by, and joined
+onto `cases` in a single vectorised pass, giving one row per case with its
+touch counts, first/last contact, total handle time and agent messages.
+Channel-mix and repeat-contact questions are then scans of `case_journeys`.
+
+Incremental refreshes recompute only the cases that are new, were upserted,
+or gained WhatsApp/omni events or a phone call since the last build.
+"""
+
+import pandas as pd
+
+JOURNEY_TABLE = "case_journeys"
+SCOPE_TABLE = "_journey_scope"
+
+# Channel -> (table, case key column, event time column); phone reaches
+# cases through session_id. The phone export has no created_date: its call
+# time is only known when the export carries a "Call Date Time" column.
+CHANNELS = {
+    "whatsapp": ("whatsapp", "case_id", "created_date"),
+    "phone": ("phone", "session_id", "call_date_time"),
+    "omni": ("salesforce_omni_channel", "work_item_id", "created_date"),
+}
+
+
+def _has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f'PRAGMA table_info("{table}")'))
+
+
+def _to_utc(series):
+    return pd.to_datetime(series, utc=True, errors="coerce", format="ISO8601")
+
+
+def _read_events(conn, channel, scoped):
+    """
+    One channel's events as (key, event_time, handle_time, agent_messages).
+    """
+    table, key, time_col = CHANNELS[channel]
+    # Without an event time the channel still counts touches, with no first/last contact
+    time_expr = f'"{time_col}"' if _has_column(conn, table, time_col) else "NULL"
+    handle_expr = "handle_time" if channel != "whatsapp" else "NULL"
+    messages_expr = "agent_message_count" if channel == "whatsapp" else "NULL"
+
+    where = f'"{key}" IS NOT NULL'
+    if scoped and channel == "phone":
+        where += f' AND "{key}" IN (SELECT session_id FROM cases WHERE id IN (SELECT id FROM {SCOPE_TABLE}))'
+    elif scoped:
+        where += f' AND "{key}" IN (SELECT id FROM {SCOPE_TABLE})'
+
+    events = pd.read_sql_query(
+        f"""SELECT "{key}" AS key, {time_expr} AS event_time,
+            {handle_expr} AS handle_time, {messages_expr} AS agent_messages
+        FROM "{table}" WHERE {where}""",
+        conn,
+    )
+    events["event_time"] = _to_utc(events["event_time"])
+    return events
+
+
+def _aggregate(events, channel):
+    grouped = events.groupby("key", sort=False)
+    return pd.DataFrame({
+        f"{channel}_touches": grouped.size(),
+        f"{channel}_first": grouped["event_time"].min(),
+        f"{channel}_last": grouped["event_time"].max(),
+        f"{channel}_handle_time_m": grouped["handle_time"].sum(),
+        f"{channel}_agent_messages": grouped["agent_messages"].sum(),
+    })
+
+
+def build_journeys(conn, scoped=False) -> pd.DataFrame:
+    """
+    Build journey rows for every case, or (with `scoped=True`) only for the
+    case ids in the temporary _journey_scope table.
+
+    Returns:
+        pd.DataFrame: One row per case with origin, issue type, per-channel
+        touch counts, channel mix, first/last contact, total handle time
+        (minutes) and total agent messages.
+    """
+    where = f" WHERE id IN (SELECT id FROM {SCOPE_TABLE})" if scoped else ""
+    cases = pd.read_sql_query(
+        f"SELECT id AS case_id, session_id, created_date, origin, issue_type, trader_id FROM cases{where}",
+        conn,
+    )
+    cases["created_date"] = _to_utc(cases["created_date"])
+
+    # One group-by per channel, then hash joins onto the case rows
+    aggregates = {channel: _aggregate(_read_events(conn, channel, scoped), channel) for channel in CHANNELS}
+    journeys = cases.join(aggregates["whatsapp"], on="case_id")
+    journeys = journeys.join(aggregates["omni"], on="case_id")
+    journeys = journeys.join(aggregates["phone"], on="session_id")
+
+    touches = [f"{channel}_touches" for channel in CHANNELS]
+    journeys[touches] = journeys[touches].fillna(0).astype("int64")
+    journeys["total_touches"] = journeys[touches].sum(axis=1)
+    present = journeys[touches].to_numpy() > 0
+    journeys["channel_count"] = present.sum(axis=1)
+    # e.g. "whatsapp+omni"; "none" for a case with no channel events
+    mix = pd.Series("", index=journeys.index, dtype=object)
+    for i, channel in enumerate(CHANNELS):
+        mix = mix.where(~present[:, i], mix + "+" + channel)
+    journeys["channel_mix"] = mix.str.lstrip("+").replace("", "none")
+
+    times = ["created_date"] + [f"{c}_{edge}" for c in CHANNELS for edge in ("first", "last")]
+    journeys["first_contact"] = journeys[times].min(axis=1)
+    journeys["last_contact"] = journeys[times].max(axis=1)
+    journeys["total_handle_time_m"] = journeys[["phone_handle_time_m", "omni_handle_time_m"]].sum(axis=1)
+    journeys["total_agent_messages"] = journeys["whatsapp_agent_messages"].fillna(0).astype("int64")
+    journeys["refreshed_at"] = pd.Timestamp.now(tz="UTC")
+
+    return journeys[[
+        "case_id",
+        "created_date",
+        "origin",
+        "issue_type",
+        "trader_id",
+        *touches,
+        "total_touches",
+        "channel_count",
+        "channel_mix",
+        "first_contact",
+        "last_contact",
+        "total_handle_time_m",
+        "total_agent_messages",
+        "refreshed_at",
+    ]]
+
+
+def _table_exists(conn, table):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def stale_case_ids(conn, since) -> list:
+    """
+    Cases whose journey must be recomputed: not in case_journeys yet,
+    created or re-upserted at or after `since`, with WhatsApp or omni events
+    at or after `since`, or with a phone call the journey hasn't counted.
+    """
+    mark = pd.Timestamp(since).tz_convert("UTC").strftime("%Y-%m-%d %H:%M:%S")
+    rows = conn.execute(
+        f"""
+        SELECT id FROM cases WHERE id NOT IN (SELECT case_id FROM {JOURNEY_TABLE})
+        UNION SELECT id FROM cases WHERE created_date >= :mark
+        UNION SELECT case_id FROM whatsapp WHERE created_date >= :mark AND case_id IS NOT NULL
+        UNION SELECT work_item_id FROM salesforce_omni_channel WHERE created_date >= :mark
+        UNION SELECT j.case_id
+            FROM {JOURNEY_TABLE} j
+            JOIN cases c ON c.id = j.case_id
+            JOIN phone p ON p.session_id = c.session_id
+            WHERE j.phone_touches = 0
+        """,
+        {"mark": mark},
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def refresh_journeys(conn, since=None) -> int:
+    """
+    Rebuild case_journeys, or with `since` (the earliest previous watermark
+    of cases/whatsapp/omni) recompute only the stale cases and swap their
+    rows in one transaction.
+
+    Returns:
+        int: Journey rows written.
+    """
+    if since is None or not _table_exists(conn, JOURNEY_TABLE):
+        journeys = build_journeys(conn)
+        journeys.to_sql(JOURNEY_TABLE, conn, if_exists="replace", index=False)
+        _index(conn)
+        return len(journeys)
+
+    case_ids = stale_case_ids(conn, since)
+    if not case_ids:
+        return 0
+
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {SCOPE_TABLE} (id TEXT PRIMARY KEY)")
+    conn.execute(f"DELETE FROM {SCOPE_TABLE}")
+    conn.executemany(f"INSERT OR IGNORE INTO {SCOPE_TABLE} (id) VALUES (?)", ((i,) for i in case_ids))
+    journeys = build_journeys(conn, scoped=True)
+
+    staging = f"_staging_{JOURNEY_TABLE}"
+    journeys.to_sql(staging, conn, if_exists="replace", index=False)
+    with conn:
+        conn.execute(f"DELETE FROM {JOURNEY_TABLE} WHERE case_id IN (SELECT id FROM {SCOPE_TABLE})")
+        conn.execute(f"INSERT INTO {JOURNEY_TABLE} SELECT * FROM {staging}")
+        conn.execute(f"DROP TABLE {staging}")
+    conn.execute(f"DROP TABLE {SCOPE_TABLE}")
+    return len(journeys)
+
+
+def _index(conn):
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{JOURNEY_TABLE}_case_id" ON {JOURNEY_TABLE} (case_id)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{JOURNEY_TABLE}_channel_mix" ON {JOURNEY_TABLE} (channel_mix)')
+    conn.commit()
@@ -1,6 +1,20 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+import argparse
 import sqlite3
-from utils.data_processors import load_and_clean
+import time
+import pandas as pd
+from utils.data_processors import (
+    load_and_clean,
+    load_and_clean_chunks,
+    load_and_clean_sql,
+    load_parquet_chunks,
+    stage_parquet,
+)
+from src.case_journeys import refresh_journeys
+from src.mart_aggregates import create_indexes, refresh_summaries
+from src.metrics_service import refresh_trader_metrics
+from src.time_series_marts import refresh_time_series
 
 root = Path.cwd()
 phone_path = root / "data" / "phone.csv"
@@ -8,27 +22,480 @@ case_path = root / "data" / "cases.csv"
 omni_path = root / "data" / "salesforce_omni_channel.csv"
 whatsapp_path = root / "data" / "whatsapp.csv"
 
-
-# Some pre-processing of data
-phone = load_and_clean(phone_path)
-cases = load_and_clean(case_path)
-omni = load_and_clean(omni_path)
-whatsapp = load_and_clean(whatsapp_path)
-
+# Source database that data_to_csvs.py exports from
+source_db_path = root / "db" / "case.db"
+stage_dir = root / "data" / "staged"
 
 # Create Check a trade 'marts'
 db_path = root / "db" / "check_marts.db"
 
-conn = sqlite3.connect(db_path)
+# Mart table name -> source CSV
+MART_SOURCES = {
+    "phone": phone_path,
+    "cases": case_path,
+    "salesforce_omni_channel": omni_path,
+    "whatsapp": whatsapp_path,
+}
+
+# Mart table name -> table in case.db
+SOURCE_TABLES = {
+    "phone": "phone",
+    "cases": "cases",
+    "salesforce_omni_channel": "email_web_whatsapp_community",
+    "whatsapp": "whatsapp",
+}
+
+# Upsert key per mart table. Omni rows are routing events, several per work
+# item, so a work item's events are told apart by their created_date.
+MART_KEYS = {
+    "phone": ["session_id"],
+    "cases": ["id"],
+    "salesforce_omni_channel": ["work_item_id", "created_date"],
+    "whatsapp": ["id"],
+}
+
+# High-water mark column per mart table. The phone export has no creation
+# timestamp, so new phone rows are found by anti-joining on session_id (a
+# "Call Date Time" column, where an export has one, only places calls in the
+# workload marts).
+MART_WATERMARKS = {
+    "phone": None,
+    "cases": "created_date",
+    "salesforce_omni_channel": "created_date",
+    "whatsapp": "created_date",
+}
+
+WATERMARK_TABLE = "_mart_watermarks"
+
+
+def _iter_clean(path, chunksize=None):
+    if chunksize is None:
+        yield load_and_clean(path)
+    else:
+        yield from load_and_clean_chunks(path, chunksize=chunksize)
+
+
+def iter_source(table, source="csv", chunksize=None, source_conn=None, stage=False):
+    """
+    Yield cleaned chunks of a mart table from the chosen source.
+
+    - "csv": the CSVs written by data_to_csvs.py
+    - "sqlite": straight from case.db in cursor-sized batches, skipping the
+      CSV round trip
+    - "parquet": typed Parquet files previously staged from either source
+
+    With `stage=True` the cleaned chunks are also written to
+    data/staged/<table>.parquet for later "parquet" builds.
+    """
+    if source == "csv":
+        chunks = _iter_clean(MART_SOURCES[table], chunksize=chunksize)
+    elif source == "sqlite":
+        chunks = load_and_clean_sql(
+            source_conn, SOURCE_TABLES[table], chunksize=chunksize or 50_000, schema=table
+        )
+    elif source == "parquet":
+        return load_parquet_chunks(stage_dir / f"{table}.parquet", chunksize=chunksize or 50_000)
+    else:
+        raise ValueError(f"Unknown source: {source}")
+
+    if stage:
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        chunks = stage_parquet(chunks, stage_dir / f"{table}.parquet", schema=table)
+    return chunks
+
+
+def _max_watermark(df, column, current=None):
+    if column is None or column not in df.columns:
+        return current
+    latest = pd.to_datetime(df[column], utc=True, errors="coerce").max()
+    if pd.isna(latest):
+        return current
+    return latest if current is None else max(current, latest)
+
+
+def _table_exists(conn, table):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def read_watermark(conn, table):
+    """
+    Return the recorded high-water mark for `table` as a UTC timestamp, or
+    None if the table has never been built.
+    """
+    if not _table_exists(conn, WATERMARK_TABLE):
+        return None
+    row = conn.execute(
+        f"SELECT watermark FROM {WATERMARK_TABLE} WHERE table_name = ?", (table,)
+    ).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return pd.Timestamp(row[0])
+
+
+def write_watermark(conn, table, watermark):
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            watermark TEXT,
+            updated_at TEXT
+        )"""
+    )
+    conn.execute(
+        f"""INSERT INTO {WATERMARK_TABLE} (table_name, watermark, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(table_name) DO UPDATE SET
+            watermark = excluded.watermark,
+            updated_at = excluded.updated_at""",
+        (
+            table,
+            None if watermark is None else watermark.isoformat(),
+            pd.Timestamp.now(tz="UTC").isoformat(),
+        ),
+    )
+    conn.commit()
+
+
+def create_key_index(conn, table):
+    key_cols = ", ".join(f'"{k}"' for k in MART_KEYS[table])
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_key" ON "{table}" ({key_cols})')
+
+
+def merge_staging(conn, staging, table, keys):
+    """
+    Upsert the rows of `staging` (a quoted table reference) into `table` on
+    `keys`: matching rows are deleted and the staged rows inserted, in a
+    single transaction.
+
+    Keys are compared with `IS` so rows with NULL keys still replace each other.
+    """
+    target_cols = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+    staged_cols = [col[0] for col in conn.execute(f"SELECT * FROM {staging} LIMIT 0").description]
+    cols = ", ".join(f'"{c}"' for c in staged_cols if c in target_cols)
+    match = " AND ".join(f't."{k}" IS s."{k}"' for k in keys)
+
+    with conn:
+        conn.execute(
+            f"""DELETE FROM "{table}" WHERE rowid IN (
+                SELECT t.rowid FROM {staging} AS s JOIN "{table}" AS t ON {match}
+            )"""
+        )
+        conn.execute(f'INSERT INTO "{table}" ({cols}) SELECT {cols} FROM {staging}')
+
+
+def write_table(conn, table, chunks):
+    """
+    Write cleaned chunks to the marts, replacing any existing table.
+
+    Each chunk is appended (and committed) before the next is read, so when
+    the source is streamed memory stays bounded by the chunk size whatever
+    the size of the input. The table's high-water mark is recorded so later
+    runs can be incremental.
+    """
+    rows = 0
+    watermark = None
+    if_exists = "replace"
+    for chunk in chunks:
+        chunk.to_sql(table, conn, if_exists=if_exists, index=False)
+        if_exists = "append"
+        rows += len(chunk)
+        watermark = _max_watermark(chunk, MART_WATERMARKS[table], watermark)
+
+    create_key_index(conn, table)
+    write_watermark(conn, table, watermark)
+    return rows
+
+
+def new_rows(conn, table, chunks):
+    """
+    Filter cleaned chunks down to the rows an incremental refresh must load:
+    those at or past the table's high-water mark, or (for tables without a
+    watermark column) those whose key is not in the marts yet.
+
+    Rows with no parseable created_date can't be placed against the mark, so
+    they are always kept (the upsert on the key makes reloading them
+    harmless) and their count is printed. Every chunk is still read and
+    cleaned: incremental mode saves write time, not parse time.
+    """
+    keys = MART_KEYS[table]
+    column = MART_WATERMARKS[table]
+    watermark = read_watermark(conn, table)
+
+    existing_keys = None
+    if column is None:
+        existing_keys = pd.read_sql_query(
+            f'SELECT DISTINCT "{keys[0]}" FROM "{table}"', conn
+        )[keys[0]]
+
+    undated = 0
+    for chunk in chunks:
+        if existing_keys is not None:
+            chunk = chunk[~chunk[keys[0]].isin(existing_keys)]
+        elif watermark is not None:
+            created = pd.to_datetime(chunk[column], utc=True, errors="coerce")
+            undated += int(created.isna().sum())
+            chunk = chunk[(created >= watermark) | created.isna()]
+        if not chunk.empty:
+            yield chunk
+    if undated:
+        print(f"{table}: {undated} rows without a {column} reloaded")
+
+
+def upsert_table(conn, table, chunks):
+    """
+    Load only the rows newer than the table's high-water mark and upsert
+    them on the table's key, then advance the mark.
+
+    Rows at exactly the previous mark are reloaded; the upsert makes that
+    idempotent, so nothing that arrived with the same timestamp is missed.
+    Falls back to a full `write_table` if the table does not exist yet.
+    """
+    if not _table_exists(conn, table):
+        return write_table(conn, table, chunks)
+
+    create_key_index(conn, table)
+    watermark = read_watermark(conn, table)
+
+    staging = f"_staging_{table}"
+    rows = 0
+    for chunk in new_rows(conn, table, chunks):
+        chunk.to_sql(staging, conn, if_exists="replace", index=False)
+        merge_staging(conn, f'"{staging}"', table, MART_KEYS[table])
+        rows += len(chunk)
+        watermark = _max_watermark(chunk, MART_WATERMARKS[table], watermark)
+
+    conn.execute(f'DROP TABLE IF EXISTS "{staging}"')
+    write_watermark(conn, table, watermark)
+    return rows
+
+
+def stage_table(
+    table, staging_path, db_path=db_path, source="csv", chunksize=None, stage=False, incremental=False
+):
+    """
+    Clean one table into its own staging database.
+
+    Runs in a worker process of the parallel build: it only ever reads the
+    marts at `db_path` (for the incremental watermark), so the workers never
+    contend for the marts' write lock. Returns (table, rows, watermark, seconds).
+    """
+    start = time.perf_counter()
+    source_conn = sqlite3.connect(source_db_path) if source == "sqlite" else None
+    chunks = iter_source(table, source=source, chunksize=chunksize, source_conn=source_conn, stage=stage)
+
+    watermark = None
+    mart_conn = None
+    if incremental and Path(db_path).exists():
+        mart_conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        if _table_exists(mart_conn, table):
+            watermark = read_watermark(mart_conn, table)
+            chunks = new_rows(mart_conn, table, chunks)
+
+    staging_conn = sqlite3.connect(staging_path)
+    rows = 0
+    if_exists = "replace"
+    for chunk in chunks:
+        chunk.to_sql(table, staging_conn, if_exists=if_exists, index=False)
+        if_exists = "append"
+        rows += len(chunk)
+        watermark = _max_watermark(chunk, MART_WATERMARKS[table], watermark)
+
+    staging_conn.close()
+    for conn in (source_conn, mart_conn):
+        if conn is not None:
+            conn.close()
+    return table, rows, watermark, time.perf_counter() - start
+
+
+def attach_staged(conn, table, staging_path, watermark, incremental=False):
+    """
+    Move a staged table into the marts: upsert it on the table key for an
+    incremental build (when the table already exists), otherwise replace the
+    mart table with it, keeping the column types pandas declared.
+    """
+    conn.execute("ATTACH DATABASE ? AS staged", (str(staging_path),))
+    try:
+        row = conn.execute(
+            "SELECT sql FROM staged.sqlite_master WHERE type='table' AND name=?", (table,)
+        ).fetchone()
+        if row is not None:
+            if incremental and _table_exists(conn, table):
+                merge_staging(conn, f'staged."{table}"', table, MART_KEYS[table])
+            else:
+                conn.execute("BEGIN")
+                conn.execute(f'DROP TABLE IF EXISTS main."{table}"')
+                conn.execute(row[0])
+                conn.execute(f'INSERT INTO main."{table}" SELECT * FROM staged."{table}"')
+                conn.commit()
+            create_key_index(conn, table)
+            write_watermark(conn, table, watermark)
+    finally:
+        conn.execute("DETACH DATABASE staged")
+
+
+def refresh_since(conn):
+    """
+    Earliest high-water mark among the timestamped tables, read before an
+    incremental load: the journeys touched by rows at or past it, and the
+    workload buckets from its day on, are recomputed. None (a full rebuild)
+    if any of them has never been built.
+    """
+    marks = [read_watermark(conn, table) for table in ("cases", "whatsapp", "salesforce_omni_channel")]
+    if any(mark is None for mark in marks):
+        return None
+    return min(marks)
+
+
+def build_marts(db_path=db_path, chunksize=None, incremental=False, source="csv", stage=False):
+    conn = sqlite3.connect(db_path)
+    source_conn = sqlite3.connect(source_db_path) if source == "sqlite" else None
+    timings = {}
+    since = refresh_since(conn) if incremental else None
+
+    # Write each cleaned DataFrame to the database
+    for table in MART_SOURCES:
+        start = time.perf_counter()
+        chunks = iter_source(
+            table, source=source, chunksize=chunksize, source_conn=source_conn, stage=stage
+        )
+        if incremental:
+            rows = upsert_table(conn, table, chunks)
+            print(f"{table}: {rows} new or updated rows")
+        else:
+            rows = write_table(conn, table, chunks)
+            print(f"{table}: {rows} rows")
+        timings[f"{table} (clean + write)"] = time.perf_counter() - start
+
+    _finish_build(conn, timings, since)
+    if source_conn is not None:
+        source_conn.close()
+
+    print(f"✅ Written to {db_path}")
+
+
+def build_marts_parallel(
+    db_path=db_path, workers=4, chunksize=None, incremental=False, source="csv", stage=False
+):
+    """
+    Clean the four tables concurrently in a process pool, each into its own
+    staging database under db/staging/, and attach each one to the marts as
+    soon as it is ready. Only the attach step writes to check_marts.db, so
+    writes stay serialised while the cleaning runs on all cores.
+    """
+    staging_dir = Path(db_path).parent / "staging"
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    timings = {}
+    since = refresh_since(conn) if incremental else None
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                stage_table,
+                table,
+                staging_dir / f"{table}.db",
+                db_path=db_path,
+                source=source,
+                chunksize=chunksize,
+                stage=stage,
+                incremental=incremental,
+            )
+            for table in MART_SOURCES
+        ]
+        for future in as_completed(futures):
+            table, rows, watermark, seconds = future.result()
+            timings[f"{table} (clean)"] = seconds
+
+            start = time.perf_counter()
+            staging_path = staging_dir / f"{table}.db"
+            attach_staged(conn, table, staging_path, watermark, incremental=incremental)
+            staging_path.unlink()
+            timings[f"{table} (write)"] = time.perf_counter() - start
+            print(f"{table}: {rows} {'new or updated ' if incremental else ''}rows")
+
+    staging_dir.rmdir()
+    _finish_build(conn, timings, since)
+
+    print(f"✅ Written to {db_path}")
+
+
+def _finish_build(conn, timings, since=None):
+    # Index the join keys, rebuild the dashboard summary tables, refresh the
+    # per-case journeys and workload time series (only what changed for an
+    # incremental build) and the per-trader metrics
+    start = time.perf_counter()
+    create_indexes(conn)
+    timings["indexes"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    refresh_summaries(conn)
+    timings["summaries"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = refresh_journeys(conn, since=since)
+    print(f"case_journeys: {rows} {'recomputed ' if since is not None else ''}rows")
+    timings["case journeys"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = refresh_time_series(conn, since=since)
+    print(f"workload_daily: {rows} {'recomputed ' if since is not None else ''}rows")
+    timings["workload time series"] = time.perf_counter() - start
+
+    # Per-trader metrics for the assistant tools; a full rebuild, it's small
+    start = time.perf_counter()
+    print(f"trader_metrics: {refresh_trader_metrics(conn)} traders")
+    timings["trader metrics"] = time.perf_counter() - start
+
+    # Commit and close
+    conn.commit()
+    conn.close()
+
+    print("Stage timings:")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<45} {seconds:7.2f}s")
 
-# Write each cleaned DataFrame to the database
-phone.to_sql("phone", conn, if_exists="replace", index=False)
-cases.to_sql("cases", conn, if_exists="replace", index=False)
-omni.to_sql("salesforce_omni_channel", conn, if_exists="replace", index=False)
-whatsapp.to_sql("whatsapp", conn, if_exists="replace", index=False)
 
-# Commit and close
-conn.commit()
-conn.close()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build check_marts.db from the cleaned CSVs.")
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream each CSV in chunks of this many rows (bounded memory).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Upsert only rows past each table's high-water mark instead of a full rebuild.",
+    )
+    parser.add_argument(
+        "--source",
+        choices=["csv", "sqlite", "parquet"],
+        default="csv",
+        help="Read the CSV exports, db/case.db directly, or previously staged Parquet.",
+    )
+    parser.add_argument(
+        "--stage",
+        action="store_true",
+        help="Also write the cleaned tables to data/staged/*.parquet.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Clean the tables in parallel across this many processes.",
+    )
+    args = parser.parse_args()
 
-print(f"✅ Written to {db_path}")
+    options = dict(
+        chunksize=args.chunksize,
+        incremental=args.incremental,
+        source=args.source,
+        stage=args.stage,
+    )
+    if args.workers:
+        build_marts_parallel(workers=args.workers, **options)
+    else:
+        build_marts(**options)
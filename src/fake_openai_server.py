@@ -0,0 +1,234 @@
+"""
+Local stand-in for the OpenAI chat completions API, for load tests and
+offline development.
+
+Serves POST /v1/chat/completions (plain and `stream=True` server-sent events)
+with OpenAI-shaped responses and token usage, after a simulated latency, and
+injects 429 and 5xx errors at configurable rates. Point a client at it with
+`base_url="http://127.0.0.1:8001/v1"` (or OPENAI_BASE_URL for the apps).
+
+    python -m src.fake_openai_server --port 8001 --latency-ms 800 --error-rate-429 0.05
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORDS = (
+    "reliable friendly local qualified electrician plumber builder service quality "
+    "customers homes repairs installations free quotes fully insured years experience"
+).split()
+
+
+class FakeServerConfig:
+    def __init__(
+            self,
+            latency_ms: float = 800,
+            latency_sigma: float = 0.5,
+            ttft_ms: float = 300,
+            completion_tokens: int = 250,
+            error_rate_429: float = 0.0,
+            error_rate_5xx: float = 0.0,
+            seed: int = None,
+            ) -> None:
+        """
+        Behaviour of the fake server.
+
+        Args:
+            latency_ms (float, optional): Median total response time; drawn from a
+                lognormal distribution. Defaults to 800.
+            latency_sigma (float, optional): Lognormal shape (spread of the
+                latency tail). Defaults to 0.5.
+            ttft_ms (float, optional): Median time to the first streamed token,
+                within the total. Defaults to 300.
+            completion_tokens (int, optional): Tokens per completion. Defaults to 250.
+            error_rate_429 (float, optional): Fraction of requests rejected with
+                429 (with a Retry-After header). Defaults to 0.
+            error_rate_5xx (float, optional): Fraction failing with 500/502/503. Defaults to 0.
+            seed (int, optional): Seed for reproducible latencies and errors.
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.ttft_ms = ttft_ms
+        self.completion_tokens = completion_tokens
+        self.error_rate_429 = error_rate_429
+        self.error_rate_5xx = error_rate_5xx
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "ok": 0, "429": 0, "5xx": 0}
+
+    def draw(self) -> tuple:
+        """
+        (HTTP status, total seconds, seconds to first token) for one request.
+        """
+        with self.lock:
+            roll = self.random.random()
+            total = self.latency_ms / 1000 * self.random.lognormvariate(0, self.latency_sigma)
+            self.counts["requests"] += 1
+            if roll < self.error_rate_429:
+                status, outcome = 429, "429"
+            elif roll < self.error_rate_429 + self.error_rate_5xx:
+                status, outcome = self.random.choice([500, 502, 503]), "5xx"
+            else:
+                status, outcome = 200, "ok"
+            self.counts[outcome] += 1
+        # First token arrives at the same fraction of the total as the medians
+        ttft = total * min(1.0, self.ttft_ms / self.latency_ms) if self.latency_ms else 0.0
+        return status, total, ttft
+
+
+def _completion_text(n_tokens: int, config: FakeServerConfig) -> list:
+    # One word per token keeps the usage counts honest
+    with config.lock:
+        return [config.random.choice(_WORDS) + " " for _ in range(n_tokens)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: FakeServerConfig = None
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, self.config.counts)
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        status, total, ttft = self.config.draw()
+        if status == 429:
+            time.sleep(min(total, 0.05))
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                headers={"Retry-After": "1"},
+            )
+            return
+        if status != 200:
+            time.sleep(total / 2)
+            self._send_json(
+                status,
+                {"error": {"message": "Server error", "type": "server_error"}},
+            )
+            return
+
+        prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+        usage = {
+            "prompt_tokens": max(1, prompt_chars // 4),
+            "completion_tokens": self.config.completion_tokens,
+            "total_tokens": max(1, prompt_chars // 4) + self.config.completion_tokens,
+        }
+        tokens = _completion_text(self.config.completion_tokens, self.config)
+        meta = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+        }
+
+        if request.get("stream"):
+            self._stream(meta, tokens, usage, total, ttft, request)
+        else:
+            time.sleep(total)
+            self._send_json(200, {
+                **meta,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+    def _stream(self, meta, tokens, usage, total, ttft, request) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(choices, usage=None):
+            chunk = {**meta, "object": "chat.completion.chunk", "choices": choices}
+            if usage is not None:
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        time.sleep(ttft)
+        per_token = (total - ttft) / max(1, len(tokens))
+        event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+        for token in tokens:
+            event([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+            time.sleep(per_token)
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (request.get("stream_options") or {}).get("include_usage"):
+            event([], usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, config: FakeServerConfig = None) -> tuple:
+    """
+    Start the fake server on a background thread.
+
+    Returns:
+        tuple: (server, base_url); call `server.shutdown()` to stop it.
+    """
+    handler = type("Handler", (_Handler,), {"config": config or FakeServerConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=800, help="Median response time.")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal spread of response times.")
+    parser.add_argument("--ttft-ms", type=float, default=300, help="Median time to first streamed token.")
+    parser.add_argument("--completion-tokens", type=int, default=250)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeServerConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        ttft_ms=args.ttft_ms,
+        completion_tokens=args.completion_tokens,
+        error_rate_429=args.error_rate_429,
+        error_rate_5xx=args.error_rate_5xx,
+        seed=args.seed,
+    )
+    server, base_url = start_server(args.host, args.port, config)
+    print(f"Fake OpenAI server on {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
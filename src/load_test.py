@@ -0,0 +1,283 @@
+"""
+Load-generation harness for the AI paths.
+
+Drives AISummary (sync `get_response`, streamed `stream_response`) or
+AsyncAISummary at a target request rate with open-loop (Poisson) arrivals,
+so a slow server shows up as queueing rather than as a lower offered load.
+Reports achieved throughput, latency and time-to-first-token percentiles and
+error rates, plus the cache hit rate when `--distinct-prompts` makes prompts
+repeat.
+
+By default a fake server (src/fake_openai_server.py) is started in-process:
+
+    python -m src.load_test --mode async --rps 20 --duration 30 --error-rate-429 0.05
+    python -m src.load_test --mode async --rps 20 --rpm 600 --tpm 300000
+    python -m src.load_test --mode stream --rps 5 --workers 16 --base-url http://127.0.0.1:8001/v1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import numpy as np
+import openai
+
+from src.fake_openai_server import FakeServerConfig, start_server
+from src.response_cache import ResponseCache
+from src.summary_client import AISummary, AsyncAISummary
+from src.telemetry import Telemetry
+
+SYSTEM_PROMPT = "You write short Checkatrade profile descriptions."
+
+
+def _arrivals(rps: float, duration: float, seed: int = None) -> list:
+    """
+    Poisson arrival offsets (seconds) over `duration` at `rps` on average.
+    """
+    rng = random.Random(seed)
+    offsets, t = [], 0.0
+    while True:
+        t += rng.expovariate(rps)
+        if t >= duration:
+            return offsets
+        offsets.append(t)
+
+
+def _prompts(n_requests: int, distinct: int = None, seed: int = None) -> list:
+    rng = random.Random(seed)
+    pool = distinct or n_requests
+    return [f"Trade: electrician\nLocation: town {rng.randrange(pool)}" for _ in range(n_requests)]
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+def _report(samples: list, wall: float, telemetry: Telemetry) -> dict:
+    """
+    Summarise (latency_s, ttft_s, error) samples from one run.
+    """
+    ok = [s for s in samples if s[2] is None]
+    errors = {}
+    for _, _, error in samples:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    calls = telemetry.summary()
+    return {
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "error_rate": (len(samples) - len(ok)) / len(samples) if samples else 0.0,
+        "errors": errors,
+        "throughput_rps": len(ok) / wall if wall else 0.0,
+        "latency_s": _percentiles([s[0] for s in ok]),
+        "ttft_s": _percentiles([s[1] for s in ok if s[1] is not None]),
+        "cache_hit_rate": calls["cache_hit_rate"],
+        "completion_tokens_per_s": calls["completion_tokens"] / wall if wall else 0.0,
+        "wall_s": wall,
+    }
+
+
+def run_sync(summariser: AISummary, prompts: list, offsets: list, workers: int, stream: bool) -> tuple:
+    """
+    Submit each request to a thread pool at its arrival time. Latency counts
+    from the scheduled arrival, so time spent waiting for a worker is included.
+    """
+    def call(prompt, scheduled):
+        ttft = None
+        try:
+            if stream:
+                for _ in summariser.stream_response(prompt, SYSTEM_PROMPT):
+                    if ttft is None:
+                        ttft = time.perf_counter() - scheduled
+            else:
+                summariser.get_response(prompt, SYSTEM_PROMPT)
+            return time.perf_counter() - scheduled, ttft, None
+        except Exception as error:
+            return time.perf_counter() - scheduled, ttft, type(error).__name__
+
+    start = time.perf_counter()
+    futures = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for prompt, offset in zip(prompts, offsets):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(call, prompt, start + offset))
+        samples = [future.result() for future in futures]
+    return samples, time.perf_counter() - start
+
+
+async def run_async(summariser: AsyncAISummary, prompts: list, offsets: list) -> tuple:
+    """
+    Start each request as a task at its arrival time; AsyncAISummary's
+    concurrency limit and rate budget decide when it actually runs.
+    """
+    async def call(prompt, scheduled):
+        try:
+            await summariser.get_response(prompt, SYSTEM_PROMPT)
+            return time.perf_counter() - scheduled, None, None
+        except Exception as error:
+            return time.perf_counter() - scheduled, None, type(error).__name__
+
+    start = time.perf_counter()
+    tasks = []
+    for prompt, offset in zip(prompts, offsets):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(call(prompt, start + offset)))
+    samples = await asyncio.gather(*tasks)
+    return samples, time.perf_counter() - start
+
+
+def load_test(
+    base_url: str,
+    mode: str = "sync",
+    rps: float = 10,
+    duration: float = 30,
+    workers: int = 8,
+    max_retries: int = 2,
+    distinct_prompts: int = None,
+    cache: bool = False,
+    seed: int = None,
+    **async_options,
+) -> dict:
+    """
+    Run one load test against `base_url` and return the report.
+
+    Args:
+        base_url (str): OpenAI-compatible API base URL.
+        mode (str, optional): "sync", "stream" or "async". Defaults to "sync".
+        rps (float, optional): Target arrival rate. Defaults to 10.
+        duration (float, optional): Seconds of arrivals. Defaults to 30.
+        workers (int, optional): Thread pool size (sync/stream) or
+            max_concurrency (async). Defaults to 8.
+        max_retries (int, optional): OpenAI client retries (sync/stream; async
+            retries are AsyncAISummary's own). Defaults to 2.
+        distinct_prompts (int, optional): Draw prompts from this many distinct
+            ones, so repeats can hit the cache. Defaults to all distinct.
+        cache (bool, optional): Use an in-memory ResponseCache. Defaults to False.
+        seed (int, optional): Seed for arrivals and prompts.
+        **async_options: Passed to AsyncAISummary (requests_per_minute, ...).
+            Unless given, the request and token budgets default to ten times
+            the offered load, so the client-side rate limiter does not cap
+            the test.
+    """
+    offsets = _arrivals(rps, duration, seed)
+    prompts = _prompts(len(offsets), distinct_prompts, seed)
+    if mode == "async":
+        # Tokens reserved per request, as AsyncAISummary._estimate_tokens
+        reserved = (max(map(len, prompts), default=0) + len(SYSTEM_PROMPT)) // 4 + async_options.get(
+            "expected_output_tokens", 500
+        )
+        async_options.setdefault("requests_per_minute", rps * 60 * 10)
+        async_options.setdefault("tokens_per_minute", rps * 60 * 10 * reserved)
+    telemetry = Telemetry(max_records=None)
+    response_cache = ResponseCache(path=None) if cache else None
+
+    if mode == "async":
+        async def main():
+            async with openai.AsyncOpenAI(api_key="load-test", base_url=base_url, max_retries=0) as client:
+                summariser = AsyncAISummary(
+                    client, cache=response_cache, max_concurrency=workers,
+                    telemetry=telemetry, **async_options,
+                )
+                return await run_async(summariser, prompts, offsets)
+        samples, wall = asyncio.run(main())
+    else:
+        client = openai.OpenAI(
+            api_key="load-test",
+            base_url=base_url,
+            max_retries=max_retries,
+            # One pooled connection per worker thread
+            http_client=openai.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=workers, max_keepalive_connections=workers)
+            ),
+        )
+        summariser = AISummary(client, cache=response_cache, telemetry=telemetry)
+        samples, wall = run_sync(summariser, prompts, offsets, workers, stream=mode == "stream")
+
+    report = _report(samples, wall, telemetry)
+    report.update({"mode": mode, "target_rps": rps, "workers": workers})
+    if mode == "async":
+        report["budget_rpm"] = async_options["requests_per_minute"]
+        report["budget_tpm"] = async_options["tokens_per_minute"]
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test AISummary against an OpenAI-compatible server.")
+    parser.add_argument("--mode", choices=["sync", "stream", "async"], default="sync")
+    parser.add_argument("--rps", type=float, default=10, help="Target requests per second.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of arrivals.")
+    parser.add_argument("--workers", type=int, default=8, help="Threads (sync/stream) or max concurrency (async).")
+    parser.add_argument("--max-retries", type=int, default=2, help="OpenAI client retries for sync/stream.")
+    parser.add_argument(
+        "--rpm", type=float, default=None, help="Async requests-per-minute budget (default 10x the offered load)."
+    )
+    parser.add_argument(
+        "--tpm", type=float, default=None, help="Async tokens-per-minute budget (default 10x the offered load)."
+    )
+    parser.add_argument("--distinct-prompts", type=int, default=None, help="Repeat prompts from a pool of N.")
+    parser.add_argument("--cache", action="store_true", help="Use an in-memory response cache.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    parser.add_argument("--base-url", default=None, help="Server to test; default starts a fake server.")
+    server_options = parser.add_argument_group("fake server (when --base-url is not given)")
+    server_options.add_argument("--latency-ms", type=float, default=800)
+    server_options.add_argument("--latency-sigma", type=float, default=0.5)
+    server_options.add_argument("--ttft-ms", type=float, default=300)
+    server_options.add_argument("--completion-tokens", type=int, default=250)
+    server_options.add_argument("--error-rate-429", type=float, default=0.0)
+    server_options.add_argument("--error-rate-5xx", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_server(config=FakeServerConfig(
+            latency_ms=args.latency_ms,
+            latency_sigma=args.latency_sigma,
+            ttft_ms=args.ttft_ms,
+            completion_tokens=args.completion_tokens,
+            error_rate_429=args.error_rate_429,
+            error_rate_5xx=args.error_rate_5xx,
+            seed=args.seed,
+        ))
+
+    async_options = {}
+    if args.rpm:
+        async_options["requests_per_minute"] = args.rpm
+    if args.tpm:
+        async_options["tokens_per_minute"] = args.tpm
+
+    report = load_test(
+        base_url,
+        mode=args.mode,
+        rps=args.rps,
+        duration=args.duration,
+        workers=args.workers,
+        max_retries=args.max_retries,
+        distinct_prompts=args.distinct_prompts,
+        cache=args.cache,
+        seed=args.seed,
+        **async_options,
+    )
+    if server is not None:
+        report["server"] = dict(server.RequestHandlerClass.config.counts)
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("=" * 60)
+        for name, value in report.items():
+            print(f"{name:<24}: {value}")
+        print("=" * 60)
@@ -0,0 +1,122 @@
+"""
+Indexes and materialised summary tables for check_marts.db.
+
+The base tables are written by `to_sql`, which creates no indexes, so every
+notebook join was a full scan plus a nested-loop join. `create_indexes` adds
+the join and group-by indexes, and `refresh_summaries` rebuilds the small
+summary tables that dashboards read instead of rescanning the raw tables.
+"""
+
+# Join and filter indexes: name -> (table, columns). Upsert keys (cases.id,
+# phone.session_id, omni work_item_id) are indexed by data_marts_create.py.
+MART_INDEXES = {
+    "ix_whatsapp_case_id": ("whatsapp", ["case_id"]),
+    "ix_cases_session_id": ("cases", ["session_id"]),
+    "ix_cases_issue_type": ("cases", ["issue_type", "origin"]),
+    "ix_cases_origin": ("cases", ["origin"]),
+    "ix_phone_campaign": ("phone", ["campaign", "call_type"]),
+    "ix_omni_queue_name": ("salesforce_omni_channel", ["queue_name", "work_item_id"]),
+}
+
+# Summary table name -> query, refreshed whenever the base tables are
+SUMMARY_TABLES = {
+    "summary_whatsapp_issue_type": """
+        SELECT
+            c.issue_type,
+            COUNT(w.case_id) AS wa_sessions,
+            AVG(w.agent_message_count) AS avg_agent_messages,
+            SUM(CASE WHEN w.agent_type = 'Agent' THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS agent_handled_rate
+        FROM whatsapp w
+        LEFT JOIN cases c ON w.case_id = c.id
+        GROUP BY 1
+    """,
+    "summary_whatsapp_origin": """
+        SELECT
+            c.origin,
+            COUNT(*) AS session_count
+        FROM whatsapp w
+        JOIN cases c ON w.case_id = c.id
+        GROUP BY 1
+    """,
+    "summary_cases_issue_type": """
+        SELECT
+            issue_type,
+            origin,
+            COUNT(*) AS cases
+        FROM cases
+        GROUP BY 1, 2
+    """,
+    "summary_omni_issue_type": """
+        SELECT
+            c.origin,
+            c.issue_type,
+            COUNT(*) AS routing_events,
+            COUNT(DISTINCT o.work_item_id) AS cases
+        FROM salesforce_omni_channel o
+        JOIN cases c ON o.work_item_id = c.id
+        GROUP BY 1, 2
+    """,
+    "summary_omni_queue": """
+        WITH routing_counts AS (
+            SELECT queue_name, work_item_id, COUNT(*) AS routing_count
+            FROM salesforce_omni_channel
+            GROUP BY 1, 2
+        )
+        SELECT
+            queue_name,
+            COUNT(*) AS unique_work_items,
+            SUM(routing_count) AS total_routing_events,
+            ROUND(AVG(routing_count), 2) AS avg_routing_events_per_item,
+            ROUND(100.0 * SUM(CASE WHEN routing_count > 1 THEN 1 ELSE 0 END) / COUNT(*), 1) AS pct_multi_touch_items
+        FROM routing_counts
+        GROUP BY 1
+    """,
+    "summary_phone_campaign": """
+        SELECT
+            campaign,
+            call_type,
+            COUNT(*) AS rows,
+            AVG(handle_time) AS avg_handle_time_m
+        FROM phone
+        GROUP BY 1, 2
+    """,
+    "summary_phone_issue_type": """
+        SELECT
+            c.issue_type,
+            AVG(p.handle_time) AS avg_handle_time_m,
+            COUNT(*) AS cases
+        FROM phone p
+        JOIN cases c ON p.session_id = c.session_id
+        GROUP BY 1
+    """,
+}
+
+
+def create_indexes(conn):
+    """
+    Create the join and filter indexes (if missing) and refresh the planner
+    statistics so SQLite picks them up.
+    """
+    for name, (table, columns) in MART_INDEXES.items():
+        cols = ", ".join(f'"{c}"' for c in columns)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({cols})')
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def refresh_summaries(conn):
+    """
+    Rebuild every summary table from the (indexed) base tables.
+
+    All tables are swapped in one transaction, so readers never see a
+    half-refreshed set.
+    """
+    conn.execute("BEGIN")
+    try:
+        for name, query in SUMMARY_TABLES.items():
+            conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            conn.execute(f'CREATE TABLE "{name}" AS {query}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
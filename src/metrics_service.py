@@ -0,0 +1,412 @@
+"""
+Per-tradesperson metrics for the lead-gen voice assistant's tools (see
+lead_gen_assistant.md).
+
+A voice turn can't wait on joins over the raw marts, so every mart build
+also writes `trader_metrics`: one precomputed row per trader_id with contact
+volumes and trends, response times and handle times. TraderMetricsService
+holds that table in memory as a dict keyed by trader_id, so a lookup is a
+dict access, and reloads it when check_marts.db changes on disk (checked at
+most every `check_interval` seconds), i.e. after a mart refresh.
+
+The tool functions (get_profile_metrics, response_time_checker,
+lead_diagnostics, ...) return JSON-ready dicts for the agent to speak from;
+TOOL_SCHEMAS describes them for OpenAI function calling and `call_tool`
+dispatches a tool call by name.
+
+The marts have no account id other than the case's trader_id, and no
+reviews or locations, so rating_analytics and geo_coverage_checker report
+that their data isn't available.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+METRICS_TABLE = "trader_metrics"
+DEFAULT_DB_PATH = Path("db") / "check_marts.db"
+
+# Traders slower than this share of traders get a response-time flag
+SLOW_PERCENTILE = 0.75
+
+
+def _to_utc(series):
+    return pd.to_datetime(series, utc=True, errors="coerce", format="ISO8601")
+
+
+def _per_trader(conn, query) -> pd.DataFrame:
+    df = pd.read_sql_query(query, conn)
+    df["trader_id"] = df["trader_id"].astype("int64")
+    return df
+
+
+def build_trader_metrics(conn) -> pd.DataFrame:
+    """
+    Aggregate the marts to one row per trader_id.
+
+    Volumes and trends come from case_journeys (built first), counted back
+    from the latest case in the marts (`as_of`) rather than from today, so
+    historical extracts still give meaningful "last 28 days" figures.
+
+    Returns:
+        pd.DataFrame: Indexed by trader_id.
+    """
+    journeys = _per_trader(conn, """
+        SELECT trader_id, created_date, issue_type, whatsapp_touches, phone_touches,
+            omni_touches, total_touches, total_handle_time_m, last_contact
+        FROM case_journeys
+        WHERE trader_id IS NOT NULL
+    """)
+    created = _to_utc(journeys["created_date"])
+    as_of = created.max()
+    age_days = (as_of - created) / pd.Timedelta(days=1)
+    journeys["last_7d"] = age_days < 7
+    journeys["last_28d"] = age_days < 28
+    journeys["prev_28d"] = (age_days >= 28) & (age_days < 56)
+    journeys["repeat_contact"] = journeys["total_touches"] > 1
+    journeys["last_contact"] = _to_utc(journeys["last_contact"])
+
+    grouped = journeys.groupby("trader_id")
+    metrics = pd.DataFrame({
+        "cases": grouped.size(),
+        "cases_last_7d": grouped["last_7d"].sum(),
+        "cases_last_28d": grouped["last_28d"].sum(),
+        "cases_prev_28d": grouped["prev_28d"].sum(),
+        "whatsapp_sessions": grouped["whatsapp_touches"].sum(),
+        "phone_calls": grouped["phone_touches"].sum(),
+        "omni_routing_events": grouped["omni_touches"].sum(),
+        "repeat_contact_rate": grouped["repeat_contact"].mean(),
+        "avg_handle_time_per_case_m": grouped["total_handle_time_m"].mean(),
+        "last_contact": grouped["last_contact"].max(),
+    })
+    previous = metrics["cases_prev_28d"].replace(0, np.nan)
+    metrics["case_trend_pct"] = 100 * (metrics["cases_last_28d"] - previous) / previous
+
+    issues = journeys.dropna(subset=["issue_type"]).groupby(["trader_id", "issue_type"]).size()
+    top = issues.sort_values(ascending=False, kind="stable").reset_index().drop_duplicates("trader_id")
+    metrics["top_issue_type"] = top.set_index("trader_id")["issue_type"]
+
+    # WhatsApp: minutes from the session starting to an agent accepting it
+    whatsapp = _per_trader(conn, """
+        SELECT c.trader_id, w.created_date, w.accept_time
+        FROM whatsapp w
+        JOIN cases c ON w.case_id = c.id
+        WHERE c.trader_id IS NOT NULL
+    """)
+    whatsapp["wait_m"] = (
+        _to_utc(whatsapp["accept_time"]) - _to_utc(whatsapp["created_date"])
+    ) / pd.Timedelta(minutes=1)
+    whatsapp["within_1h"] = (whatsapp["wait_m"] <= 60).where(whatsapp["wait_m"].notna())
+    grouped = whatsapp.groupby("trader_id")
+    metrics["whatsapp_median_response_m"] = grouped["wait_m"].median()
+    metrics["whatsapp_answered_within_1h"] = grouped["within_1h"].mean()
+
+    omni = _per_trader(conn, """
+        SELECT c.trader_id, o.speed_to_answer, o.handle_time
+        FROM salesforce_omni_channel o
+        JOIN cases c ON o.work_item_id = c.id
+        WHERE c.trader_id IS NOT NULL
+    """)
+    grouped = omni.groupby("trader_id")
+    metrics["omni_avg_speed_to_answer_m"] = grouped["speed_to_answer"].mean()
+    metrics["omni_avg_handle_time_m"] = grouped["handle_time"].mean()
+
+    phone = _per_trader(conn, """
+        SELECT c.trader_id, p.speed_of_answer, p.handle_time
+        FROM phone p
+        JOIN cases c ON p.session_id = c.session_id
+        WHERE c.trader_id IS NOT NULL
+    """)
+    grouped = phone.groupby("trader_id")
+    metrics["phone_avg_speed_of_answer_m"] = grouped["speed_of_answer"].mean()
+    metrics["phone_avg_handle_time_m"] = grouped["handle_time"].mean()
+
+    # 1.0 = the slowest median WhatsApp response of any trader
+    metrics["whatsapp_response_percentile"] = metrics["whatsapp_median_response_m"].rank(pct=True)
+    metrics["as_of"] = as_of
+    metrics["refreshed_at"] = pd.Timestamp.now(tz="UTC")
+    metrics.index.name = "trader_id"
+    return metrics
+
+
+def refresh_trader_metrics(conn) -> int:
+    """
+    Rebuild trader_metrics from the marts (after case_journeys).
+
+    Returns:
+        int: Traders written.
+    """
+    metrics = build_trader_metrics(conn)
+    metrics.to_sql(METRICS_TABLE, conn, if_exists="replace", index=True)
+    conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "ix_{METRICS_TABLE}_trader_id" ON {METRICS_TABLE} (trader_id)')
+    conn.commit()
+    return len(metrics)
+
+
+def _json_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else round(float(value), 2)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+class TraderMetricsService:
+    def __init__(self, db_path=DEFAULT_DB_PATH, check_interval: float = 1.0) -> None:
+        """
+        In-memory, keyed view of trader_metrics.
+
+        Args:
+            db_path (str or Path, optional): The marts database. Defaults to
+                db/check_marts.db.
+            check_interval (float, optional): Seconds between checks of the
+                database file for a refresh. Defaults to 1.0.
+        """
+        self.db_path = Path(db_path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._metrics = None
+        self._platform = None
+        self._version = None
+        self._checked = 0.0
+
+    def _file_version(self):
+        stat = os.stat(self.db_path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> None:
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            df = pd.read_sql_query(f"SELECT * FROM {METRICS_TABLE}", conn)
+        finally:
+            conn.close()
+
+        platform = {
+            "traders": len(df),
+            "median_whatsapp_response_m": _json_value(df["whatsapp_median_response_m"].median()),
+            "median_cases_last_28d": _json_value(df["cases_last_28d"].median()),
+            "median_repeat_contact_rate": _json_value(df["repeat_contact_rate"].median()),
+            "median_handle_time_per_case_m": _json_value(df["avg_handle_time_per_case_m"].median()),
+        }
+        records = {}
+        for record in df.to_dict("records"):
+            records[int(record["trader_id"])] = {key: _json_value(value) for key, value in record.items()}
+        # Swapped in whole, so readers never see a half-loaded table
+        self._metrics, self._platform = records, platform
+
+    def _current(self) -> dict:
+        now = time.monotonic()
+        if self._metrics is not None and now - self._checked < self.check_interval:
+            return self._metrics
+        with self._lock:
+            if self._metrics is None or now - self._checked >= self.check_interval:
+                version = self._file_version()
+                if self._metrics is None or version != self._version:
+                    self._load()
+                    self._version = version
+                self._checked = now
+            return self._metrics
+
+    def invalidate(self) -> None:
+        """
+        Drop the in-memory copy; the next lookup reloads it.
+        """
+        with self._lock:
+            self._metrics = None
+
+    def get(self, trader_id):
+        """
+        Metrics for one trader, or None if the trader has no cases.
+        """
+        try:
+            key = int(float(trader_id))
+        except (TypeError, ValueError):
+            return None
+        return self._current().get(key)
+
+    def platform(self) -> dict:
+        """
+        Medians across all traders, to put one trader's figures in context.
+        """
+        self._current()
+        return self._platform
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_metrics_service(db_path=DEFAULT_DB_PATH) -> TraderMetricsService:
+    """
+    The process-wide service, created on first use.
+    """
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = TraderMetricsService(db_path)
+        return _SERVICE
+
+
+def _not_found(trader_id) -> dict:
+    return {"trader_id": trader_id, "found": False, "message": "No cases found for this trader."}
+
+
+def get_profile_metrics(trader_id, service: TraderMetricsService = None) -> dict:
+    """
+    Contact volumes, trend and handle times for a trader.
+    """
+    service = service or get_metrics_service()
+    m = service.get(trader_id)
+    if m is None:
+        return _not_found(trader_id)
+    return {
+        "trader_id": m["trader_id"],
+        "found": True,
+        "as_of": m["as_of"],
+        "cases": m["cases"],
+        "cases_last_7d": m["cases_last_7d"],
+        "cases_last_28d": m["cases_last_28d"],
+        "cases_prev_28d": m["cases_prev_28d"],
+        "case_trend_pct": m["case_trend_pct"],
+        "contacts": {
+            "whatsapp_sessions": m["whatsapp_sessions"],
+            "phone_calls": m["phone_calls"],
+            "omni_routing_events": m["omni_routing_events"],
+        },
+        "repeat_contact_rate": m["repeat_contact_rate"],
+        "avg_handle_time_per_case_m": m["avg_handle_time_per_case_m"],
+        "top_issue_type": m["top_issue_type"],
+        "last_contact": m["last_contact"],
+    }
+
+
+def response_time_checker(trader_id, service: TraderMetricsService = None) -> dict:
+    """
+    How quickly the trader's contacts were answered, against all traders.
+    """
+    service = service or get_metrics_service()
+    m = service.get(trader_id)
+    if m is None:
+        return _not_found(trader_id)
+    percentile = m["whatsapp_response_percentile"]
+    return {
+        "trader_id": m["trader_id"],
+        "found": True,
+        "whatsapp_median_response_m": m["whatsapp_median_response_m"],
+        "whatsapp_answered_within_1h": m["whatsapp_answered_within_1h"],
+        "platform_median_whatsapp_response_m": service.platform()["median_whatsapp_response_m"],
+        "faster_than_pct_of_traders": None if percentile is None else round(100 * (1 - percentile)),
+        "omni_avg_speed_to_answer_m": m["omni_avg_speed_to_answer_m"],
+        "phone_avg_speed_of_answer_m": m["phone_avg_speed_of_answer_m"],
+    }
+
+
+def lead_diagnostics(trader_id, service: TraderMetricsService = None) -> dict:
+    """
+    Plain-language findings on what may be holding a trader's leads back.
+    """
+    service = service or get_metrics_service()
+    m = service.get(trader_id)
+    if m is None:
+        return _not_found(trader_id)
+    platform = service.platform()
+    findings = []
+
+    trend = m["case_trend_pct"]
+    if m["cases_last_28d"] == 0:
+        findings.append("No contacts in the last 28 days.")
+    elif trend is not None and trend <= -20:
+        findings.append(f"Contact volume is down {abs(trend):.0f}% on the previous 28 days.")
+    elif trend is not None and trend >= 20:
+        findings.append(f"Contact volume is up {trend:.0f}% on the previous 28 days.")
+
+    percentile = m["whatsapp_response_percentile"]
+    if percentile is not None and percentile >= SLOW_PERCENTILE:
+        findings.append(
+            f"WhatsApp replies take a median of {m['whatsapp_median_response_m']:.0f} minutes, "
+            f"slower than {percentile:.0%} of traders."
+        )
+
+    repeat_rate, typical = m["repeat_contact_rate"], platform["median_repeat_contact_rate"]
+    if repeat_rate is not None and typical is not None and repeat_rate > typical * 1.5 and repeat_rate > 0.2:
+        findings.append(f"{repeat_rate:.0%} of cases needed more than one contact.")
+
+    if m["top_issue_type"] == "Profile Text":
+        findings.append("Most support cases are about profile text; a profile rewrite may help.")
+    elif m["top_issue_type"] == "Lead Volume - Not enough leads":
+        findings.append("Lead volume is the most common reason for contacting support.")
+
+    return {
+        "trader_id": m["trader_id"],
+        "found": True,
+        "findings": findings or ["No issues stand out in the contact history."],
+        "suggest_profile_rewrite": m["top_issue_type"] in ("Profile Text", "Lead Volume - Not enough leads"),
+        "metrics": get_profile_metrics(trader_id, service),
+    }
+
+
+def rating_analytics(trader_id, service: TraderMetricsService = None) -> dict:
+    """
+    Rating and review trends for a trader (not available yet).
+    """
+    return {
+        "trader_id": trader_id,
+        "available": False,
+        "message": "Ratings and reviews aren't in the marts yet.",
+    }
+
+
+def geo_coverage_checker(trader_id, service: TraderMetricsService = None) -> dict:
+    """
+    Which areas a trader's profile covers (not available yet).
+    """
+    return {
+        "trader_id": trader_id,
+        "available": False,
+        "message": "Trade locations and coverage areas aren't in the marts yet.",
+    }
+
+
+TOOLS = {
+    "get_profile_metrics": get_profile_metrics,
+    "response_time_checker": response_time_checker,
+    "lead_diagnostics": lead_diagnostics,
+    "rating_analytics": rating_analytics,
+    "geo_coverage_checker": geo_coverage_checker,
+}
+
+TOOL_SCHEMAS = [
+    {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": " ".join(((tool.__doc__ or name).split())),
+            "parameters": {
+                "type": "object",
+                "properties": {"trader_id": {"type": "integer", "description": "The trader's id."}},
+                "required": ["trader_id"],
+            },
+        },
+    }
+    for name, tool in TOOLS.items()
+]
+
+
+def call_tool(name: str, arguments, service: TraderMetricsService = None) -> dict:
+    """
+    Run a tool call by name; `arguments` is a dict or the JSON string an
+    OpenAI tool call carries.
+    """
+    if name not in TOOLS:
+        return {"error": f"Unknown tool: {name}"}
+    if isinstance(arguments, str):
+        arguments = json.loads(arguments or "{}")
+    return TOOLS[name](arguments.get("trader_id"), service=service)
@@ -0,0 +1,89 @@
+"""
+Prompts for generating and revising Checkatrade profiles.
+
+A profile is made of the seven sections below, each written under a
+"### <title>" heading, so a revision can regenerate just the sections it
+touches (see src/profile_revisions.py).
+"""
+
+# Section key -> (heading, what the section covers), in profile order
+PROFILE_SECTIONS = {
+    "intro": ("About Us", "A warm intro that says what they do and where."),
+    "story": ("Our Story", "A brief story of how they got started and their values."),
+    "experience": ("Experience & Qualifications", "Experience and qualifications."),
+    "services": ("Services", "A bullet list of services."),
+    "extras": ("Added Value", "Any extras or added value."),
+    "highlights": ("Recent Work", "A recent job or happy customer quote."),
+    "keywords": ("Areas We Cover", "A short closing line that naturally includes the SEO keywords."),
+}
+
+_SECTION_LIST = "\n".join(
+    f"{i}. ### {heading}: {description}"
+    for i, (heading, description) in enumerate(PROFILE_SECTIONS.values(), start=1)
+)
+
+CREATION_SYSTEM_PROMPT = f"""You are an assistant that writes friendly, effective Checkatrade profile descriptions for tradespeople.
+Follow this structure, starting each section with its heading exactly as written:
+{_SECTION_LIST}
+Include the SEO-friendly keywords subtly throughout.
+The tone should be professional but warm and clear."""
+
+REVISION_SYSTEM_PROMPT = """You are a helpful assistant that revises Checkatrade profile descriptions.
+Maintain the same structure and tone unless otherwise instructed.
+Keep it warm, clear, and professional. Apply the requested changes carefully."""
+
+ROUTING_SYSTEM_PROMPT = f"""You decide which sections of a Checkatrade profile a change request affects.
+The profile sections are:
+{chr(10).join(f"- {key}: {description}" for key, (_, description) in PROFILE_SECTIONS.items())}
+Reply with only the affected section keys, comma-separated (e.g. "services, keywords").
+Reply "all" if the request changes the whole profile, such as its tone or length."""
+
+SECTION_REVISION_SYSTEM_PROMPT = """You are a helpful assistant that revises one section of a Checkatrade profile.
+You are given the section under its "### " heading and a change request.
+Return only the revised section text, without its heading, with the requested changes applied.
+Leave anything the request does not mention unchanged.
+Keep it warm, clear, and professional."""
+
+
+def creation_message(
+        trade: str,
+        location: str,
+        business_intro: str,
+        story: str,
+        experience: str,
+        qualifications: str,
+        services: str,
+        extra_value: str,
+        example_job: str,
+        review_quote: str,
+        keywords: str,
+        ) -> str:
+    """
+    Builds the user message for a new profile from the creation form fields.
+    """
+    return f"""
+    Trade: {trade}
+    Location: {location}
+    Intro: {business_intro}
+    Story/Values: {story}
+    Experience: {experience}
+    Qualifications: {qualifications}
+    Services: {services}
+    Added Value: {extra_value}
+    Example Job: {example_job}
+    Review Quote: {review_quote}
+    Keywords: {keywords}
+    """
+
+
+def revision_message(original_profile: str, revision_request: str) -> str:
+    """
+    Builds the user message for a whole-profile revision.
+    """
+    return f"""
+    Original profile:
+    {original_profile}
+
+    Requested changes:
+    {revision_request}
+    """
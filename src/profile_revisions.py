@@ -0,0 +1,207 @@
+"""
+Section-level profile revisions.
+
+Rather than regenerating the whole profile for every change request, the
+profile is split on its section headings (see PROFILE_SECTIONS), a short
+routing call picks the sections the request touches, and only those are sent
+for revision and spliced back. Tokens and latency then scale with the edited
+fraction of the profile instead of its full length. Requests touching more
+than half the sections revise the whole profile in one call instead.
+"""
+
+import difflib
+import logging
+import re
+
+from src.profile_prompts import (
+    PROFILE_SECTIONS,
+    REVISION_SYSTEM_PROMPT,
+    ROUTING_SYSTEM_PROMPT,
+    SECTION_REVISION_SYSTEM_PROMPT,
+    revision_message,
+)
+
+logger = logging.getLogger(__name__)
+
+_HEADING_TO_KEY = {heading.lower(): key for key, (heading, _) in PROFILE_SECTIONS.items()}
+
+# A heading line: "### About Us", "**About Us**", "3. Services:" and similar
+_HEADING = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]*)?(?:\d+\.[ \t]*)?(?:\*\*)?[ \t]*(?P<title>[^\n*#:]+?)[ \t]*:?[ \t]*(?:\*\*)?[ \t]*:?[ \t]*$",
+    re.MULTILINE,
+)
+
+
+def split_sections(profile: str, min_sections: int = 2):
+    """
+    Splits a profile into its known sections.
+
+    Args:
+        profile (str): Profile text with section headings.
+        min_sections (int, optional): Fewest recognised headings for the split
+            to count. Defaults to 2.
+
+    Returns:
+        dict: {"preamble": text before the first heading, "sections": {key:
+        {"heading": heading line as written, "body": text up to the next
+        heading}}} in profile order, or None if too few headings were found.
+    """
+    matches = [
+        m for m in _HEADING.finditer(profile)
+        if m.group("title").strip().lower() in _HEADING_TO_KEY
+    ]
+    keys = [_HEADING_TO_KEY[m.group("title").strip().lower()] for m in matches]
+    if len(set(keys)) < min_sections or len(set(keys)) != len(keys):
+        return None
+
+    sections = {}
+    for i, (key, match) in enumerate(zip(keys, matches)):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(profile)
+        sections[key] = {"heading": match.group(0), "body": profile[match.end():end]}
+    return {"preamble": profile[: matches[0].start()], "sections": sections}
+
+
+def join_sections(parts: dict) -> str:
+    """
+    Inverse of split_sections: join_sections(split_sections(p)) == p.
+    """
+    return parts["preamble"] + "".join(
+        section["heading"] + section["body"] for section in parts["sections"].values()
+    )
+
+
+def _stripped(chunks):
+    # The streamed text without leading or trailing whitespace, so the
+    # section keeps its original spacing
+    started, pending = False, ""
+    for chunk in chunks:
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        text = pending + chunk
+        body = text.rstrip()
+        pending = text[len(body):]
+        if body:
+            yield body
+
+
+def profile_diff(original: str, revised: str) -> str:
+    """
+    Unified, line-level diff of two profile versions.
+    """
+    return "\n".join(
+        difflib.unified_diff(
+            original.splitlines(), revised.splitlines(),
+            fromfile="original", tofile="revised", lineterm="", n=1,
+        )
+    )
+
+
+class ProfileReviser:
+    def __init__(self, summariser, router=None) -> None:
+        """
+        Initialises the ProfileReviser.
+
+        Args:
+            summariser (AISummary): Writes the revised sections.
+            router (AISummary, optional): Picks the sections to revise; a
+                smaller, cheaper model is enough. Defaults to `summariser`.
+        """
+        self.summariser = summariser
+        self.router = router or summariser
+
+    def route(self, revision_request: str, available: list) -> list:
+        """
+        Returns the keys of the sections (among `available`) the request
+        touches; every available section if the model answers "all" or
+        nothing recognisable.
+        """
+        answer = self.router.get_response(
+            user_message=f"Change request: {revision_request}",
+            system_prompt=ROUTING_SYSTEM_PROMPT,
+            temperature=0,
+        )
+        words = set(re.findall(r"[a-z]+", (answer or "").lower()))
+        targets = [key for key in available if key in words]
+        if "all" in words or not targets:
+            return list(available)
+        return targets
+
+    def revise(self, original_profile: str, revision_request: str) -> dict:
+        """
+        Revises a profile in one go, by collecting the output of stream_revise.
+
+        Args:
+            original_profile (str): The current profile text.
+            revision_request (str): What needs changing.
+
+        Returns:
+            dict: profile (revised text), mode ("sections" or "full"),
+            sections (keys regenerated) and diff (unified diff).
+        """
+        mode, targets, pieces = self.stream_revise(original_profile, revision_request)
+        profile = "".join(piece if isinstance(piece, str) else "".join(piece) for piece in pieces)
+        return {
+            "profile": profile,
+            "mode": mode,
+            "sections": targets,
+            "diff": profile_diff(original_profile, profile),
+        }
+
+    def stream_revise(self, original_profile: str, revision_request: str) -> tuple:
+        """
+        Revises a profile as a stream, for rendering with `st.write_stream`.
+
+        The request is routed to the sections it touches and each of them is
+        streamed from its own call, so it renders as it is written. When more
+        than half the sections are touched, or the profile has no headings,
+        the whole profile is streamed from one call instead, which is then
+        faster and cheaper than a call per section.
+
+        Args:
+            original_profile (str): The current profile text.
+            revision_request (str): What needs changing.
+
+        Returns:
+            tuple: (mode, sections, pieces) - "sections" or "full", the keys
+            being regenerated, and a generator of profile pieces in order:
+            unchanged text as str, and each revised part as a generator of
+            text deltas. The rendered pieces joined together are the revised
+            profile.
+        """
+        parts = split_sections(original_profile)
+        if parts is not None:
+            targets = self.route(revision_request, list(parts["sections"]))
+            if len(targets) <= len(parts["sections"]) / 2:
+                logger.info("Revising sections: %s", ", ".join(targets))
+                return "sections", targets, self._stream_sections(parts, revision_request, targets)
+
+        logger.info("Revising the whole profile")
+        stream = self.summariser.stream_response(
+            user_message=revision_message(original_profile, revision_request),
+            system_prompt=REVISION_SYSTEM_PROMPT,
+        )
+        return "full", list(PROFILE_SECTIONS), iter([stream])
+
+    def _stream_sections(self, parts: dict, revision_request: str, targets: list):
+        unchanged = parts["preamble"]
+        for key, section in parts["sections"].items():
+            body = section["body"]
+            if key not in targets:
+                unchanged += section["heading"] + body
+                continue
+            # Keep the original spacing around the section
+            leading = body[: len(body) - len(body.lstrip())]
+            yield unchanged + section["heading"] + leading
+            yield _stripped(self.summariser.stream_response(
+                user_message=(
+                    f"Section:\n### {PROFILE_SECTIONS[key][0]}\n{body.strip()}"
+                    f"\n\nRequested changes:\n{revision_request}"
+                ),
+                system_prompt=SECTION_REVISION_SYSTEM_PROMPT,
+            ))
+            unchanged = body[len(body.rstrip()):]
+        if unchanged:
+            yield unchanged
@@ -0,0 +1,158 @@
+"""
+Two-tier cache for chat completion responses.
+
+Identical requests (same model, system prompt, user message and temperature)
+are answered from an in-memory LRU first, then from a SQLite table on disk that
+survives Streamlit reruns and restarts. Disk entries expire after `ttl` seconds
+and the least recently used are evicted beyond `max_disk_entries`.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from cachetools import LRUCache
+
+
+def make_key(model: str, system_prompt: str, user_message: str, temperature: float) -> str:
+    """
+    Stable hash of everything that determines a completion.
+    """
+    payload = json.dumps(
+        [model, system_prompt, user_message, float(temperature)], ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+            self,
+            path: str = "db/response_cache.db",
+            max_memory_entries: int = 256,
+            max_disk_entries: int = 10_000,
+            ttl: float = 7 * 24 * 3600,
+            ) -> None:
+        """
+        Initialises the cache.
+
+        Args:
+            path (str, optional): SQLite file for the disk tier; None keeps the
+                cache in memory only. Defaults to "db/response_cache.db".
+            max_memory_entries (int, optional): Size of the in-memory LRU. Defaults to 256.
+            max_disk_entries (int, optional): Disk entries kept before the least
+                recently used are evicted. Defaults to 10,000.
+            ttl (float, optional): Seconds a disk entry stays valid. Defaults to 7 days.
+        """
+        self.memory = LRUCache(maxsize=max_memory_entries)
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        # Streamlit serves each session from its own thread
+        self._lock = threading.Lock()
+
+        self.conn = None
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)"
+            )
+            self.conn.commit()
+
+    def get(self, key: str):
+        """
+        Look up a response, returning None on a miss.
+        """
+        with self._lock:
+            if key in self.memory:
+                self.hits["memory"] += 1
+                return self.memory[key]
+
+            if self.conn is not None:
+                now = time.time()
+                row = self.conn.execute(
+                    "SELECT response FROM responses WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl),
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+                    self.conn.commit()
+                    self.memory[key] = row[0]
+                    self.hits["disk"] += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, response: str, model: str = None) -> None:
+        """
+        Store a response in both tiers, then evict expired and surplus disk entries.
+        """
+        with self._lock:
+            self.memory[key] = response
+            if self.conn is None:
+                return
+
+            now = time.time()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+            self.conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+            self.conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_disk_entries,),
+            )
+            self.conn.commit()
+
+    def clear(self) -> None:
+        """
+        Empty both tiers and reset the counters.
+        """
+        with self._lock:
+            self.memory.clear()
+            if self.conn is not None:
+                self.conn.execute("DELETE FROM responses")
+                self.conn.commit()
+            self.hits = {"memory": 0, "disk": 0}
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters and the current size of each tier.
+        """
+        with self._lock:
+            disk_entries = 0
+            if self.conn is not None:
+                disk_entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+            return {
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "disk_entries": disk_entries,
+            }
@@ -2,26 +2,56 @@ from openai import OpenAI
 import openai
 from dotenv import load_dotenv
 import os 
+import asyncio
 import logging
+import time
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from src.response_cache import make_key
+from src.telemetry import get_telemetry
 os.getenv("OPENAI_API_KEY")
 
 load_dotenv()
 
+# Handlers are attached by src.telemetry.setup_logging (queued, appending),
+# not configured at import
+logger = logging.getLogger(__name__)
 
 
-logging.basicConfig(
-    filename="logs/check_ai.log",
-    filemode='w',
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+def _cache_lookup(summariser, user_message:str, system_prompt:str, temperature:float, use_cache:bool) -> tuple:
+    """
+    Returns (cache key or None, cached response or None, cache status), the
+    status being "off", "bypass" (temperature too high), "refresh", "hit" or "miss".
+    """
+    if summariser.cache is None:
+        return None, None, "off"
+    if temperature > summariser.max_cache_temperature:
+        return None, None, "bypass"
+    key = make_key(summariser.model, system_prompt, user_message, temperature)
+    if not use_cache:
+        return key, None, "refresh"
+    cached = summariser.cache.get(key)
+    return key, cached, "miss" if cached is None else "hit"
+
+
+def _usage(usage) -> dict:
+    if usage is None:
+        return {"prompt_tokens": None, "completion_tokens": None}
+    return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
 
 
 class AISummary:
     def __init__(
             self, 
             client, 
-            model: str = "gpt-4o"
+            model: str = "gpt-4o",
+            cache=None,
+            max_cache_temperature: float = 1.0,
+            telemetry=None,
             ) -> None:
         """
         Initialises the AISummary instance.
@@ -29,35 +59,425 @@ class AISummary:
         Args:
             client (openai.Client): The OpenAI API client.
             model (str, optional): The AI model to use. Defaults to "gpt-4o".
+            cache (ResponseCache, optional): Cache for identical requests
+                (see src/response_cache.py). Defaults to None (no caching).
+            max_cache_temperature (float, optional): Requests sampled above this
+                temperature always go to the API for a fresh sample. Defaults to 1.0.
+            telemetry (Telemetry, optional): Where call records go. Defaults to
+                the process-wide instance from src/telemetry.py.
         """
-        logging.info("Instantiated")
+        logger.info("Instantiated")
         self.client = client 
         self.model = model 
+        self.cache = cache
+        self.max_cache_temperature = max_cache_temperature
+        self.telemetry = telemetry or get_telemetry()
 
     def get_response(
             self,
             user_message:str,
             system_prompt:str,
             temperature:float=0.8,
+            use_cache:bool=True,
             ) -> None:
+        """
+        Returns the completion for a system prompt and user message, from the
+        cache when an identical request has been answered before.
+
+        Args:
+            user_message (str): The user message.
+            system_prompt (str): The system prompt.
+            temperature (float, optional): Sampling temperature. Defaults to 0.8.
+            use_cache (bool, optional): Set False to force a fresh completion
+                (it is still stored in the cache). Defaults to True.
+        """
+        self.user_message = user_message
+        self.system_prompt = system_prompt
+        self.temperature = temperature
+
+        start = time.perf_counter()
+        key, cached, cache_status = _cache_lookup(self, user_message, system_prompt, temperature, use_cache)
+        if cached is not None:
+            self.telemetry.record(
+                call="get_response", model=self.model, cache=cache_status,
+                latency_s=time.perf_counter() - start,
+            )
+            return cached
+
+        try:
+            response = self.client.chat.completions.create(
+                model= self.model,
+                temperature= temperature,
+                messages=[
+                    {
+                        "role":"system",
+                        "content":system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": user_message
+                    }
+                ]
+            )
+        except Exception as error:
+            self.telemetry.record(
+                call="get_response", model=self.model, cache=cache_status,
+                latency_s=time.perf_counter() - start, error=repr(error),
+            )
+            raise
+        self.telemetry.record(
+            call="get_response", model=self.model, cache=cache_status,
+            latency_s=time.perf_counter() - start, **_usage(response.usage),
+        )
+        content = response.choices[0].message.content
+        if key is not None and content is not None:
+            self.cache.set(key, content, model=self.model)
+        return content
+
+    def stream_response(
+            self,
+            user_message:str,
+            system_prompt:str,
+            temperature:float=0.8,
+            use_cache:bool=True,
+            ):
+        """
+        Yields the completion as text deltas as they arrive (`stream=True`), so
+        callers can render it progressively, e.g. with `st.write_stream`.
+
+        A cache hit is yielded as a single chunk. Otherwise the assembled text
+        is logged and cached once the stream completes; a stream abandoned part
+        way is not cached.
+
+        Args:
+            user_message (str): The user message.
+            system_prompt (str): The system prompt.
+            temperature (float, optional): Sampling temperature. Defaults to 0.8.
+            use_cache (bool, optional): As get_response. Defaults to True.
+        """
         self.user_message = user_message
         self.system_prompt = system_prompt
         self.temperature = temperature
 
-        response = self.client.chat.completions.create(
-            model= self.model,
-            temperature= self.temperature,
-            messages=[
-                {
-                    "role":"system",
-                    "content":self.system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": self.user_message
-                }
-            ]
+        start = time.perf_counter()
+        key, cached, cache_status = _cache_lookup(self, user_message, system_prompt, temperature, use_cache)
+        if cached is not None:
+            self.telemetry.record(
+                call="stream_response", model=self.model, cache=cache_status,
+                latency_s=time.perf_counter() - start,
+            )
+            yield cached
+            return
+
+        parts = []
+        usage = None
+        ttft = None
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                temperature=temperature,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message},
+                ],
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            for chunk in stream:
+                # The final chunk carries the token usage and no choices
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    parts.append(delta)
+                    yield delta
+        except Exception as error:
+            self.telemetry.record(
+                call="stream_response", model=self.model, cache=cache_status,
+                latency_s=time.perf_counter() - start, ttft_s=ttft, error=repr(error),
+            )
+            raise
+
+        content = "".join(parts)
+        self.telemetry.record(
+            call="stream_response", model=self.model, cache=cache_status,
+            latency_s=time.perf_counter() - start, ttft_s=ttft, **_usage(usage),
+        )
+        if key is not None:
+            self.cache.set(key, content, model=self.model)
+
+    def batch_get_responses(
+            self,
+            user_messages:list,
+            system_prompt:str,
+            temperature:float=0.8,
+            **kwargs,
+            ) -> list:
+        """
+        Runs many prompts concurrently from synchronous code (scripts, not a
+        running event loop) via AsyncAISummary, on an async client sharing this
+        client's API key and base URL.
+
+        Args:
+            user_messages (list): One user message per item.
+            system_prompt (str): The system prompt shared by every item.
+            temperature (float, optional): Sampling temperature. Defaults to 0.8.
+            **kwargs: Passed to AsyncAISummary (max_concurrency,
+                requests_per_minute, tokens_per_minute, max_attempts, ...).
+
+        Returns:
+            list: One {"index", "response", "error"} dict per input, in input order.
+        """
+        async def run():
+            async with openai.AsyncOpenAI(
+                api_key=self.client.api_key,
+                base_url=self.client.base_url,
+                max_retries=0,
+            ) as async_client:
+                summariser = AsyncAISummary(
+                    async_client, model=self.model, cache=self.cache,
+                    max_cache_temperature=self.max_cache_temperature,
+                    telemetry=self.telemetry, **kwargs,
+                )
+                return await summariser.batch_get_responses(
+                    user_messages, system_prompt, temperature
+                )
+
+        return asyncio.run(run())
+
+
+def is_retryable(error:BaseException) -> bool:
+    """
+    Rate limits (429), server errors (5xx), timeouts and dropped connections
+    are worth retrying; other API errors (bad request, auth) are not.
+    """
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+class RateLimiter:
+    def __init__(
+            self,
+            requests_per_minute:float=500,
+            tokens_per_minute:float=30_000,
+            ) -> None:
+        """
+        Token buckets for the per-minute request and token budgets, refilled
+        continuously. Callers wait until both buckets can cover a request.
+
+        Args:
+            requests_per_minute (float, optional): Request budget. Defaults to 500.
+            tokens_per_minute (float, optional): Token budget. Defaults to 30,000.
+        """
+        self.capacity = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self.available = dict(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        for name, capacity in self.capacity.items():
+            self.available[name] = min(capacity, self.available[name] + elapsed * capacity / 60)
+
+    async def acquire(self, tokens:int) -> None:
+        """
+        Waits until one request and `tokens` tokens are available, then takes them.
+        """
+        # A single request larger than the whole budget is let through once the bucket is full
+        tokens = min(tokens, self.capacity["tokens"])
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.available["requests"] >= 1 and self.available["tokens"] >= tokens:
+                    self.available["requests"] -= 1
+                    self.available["tokens"] -= tokens
+                    return
+                wait = max(
+                    (1 - self.available["requests"]) * 60 / self.capacity["requests"],
+                    (tokens - self.available["tokens"]) * 60 / self.capacity["tokens"],
+                )
+                await asyncio.sleep(wait)
+
+    def adjust(self, tokens:int) -> None:
+        """
+        Corrects the token bucket once the actual usage of a request is known
+        (positive when it used more than was reserved).
+        """
+        self.available["tokens"] -= tokens
+
+
+class AsyncAISummary:
+    def __init__(
+            self,
+            client,
+            model: str = "gpt-4o",
+            cache=None,
+            max_cache_temperature: float = 1.0,
+            max_concurrency: int = 8,
+            requests_per_minute: float = 500,
+            tokens_per_minute: float = 30_000,
+            expected_output_tokens: int = 500,
+            max_attempts: int = 6,
+            telemetry=None,
+            ) -> None:
+        """
+        Async counterpart of AISummary for running many prompts concurrently.
+
+        Args:
+            client (openai.AsyncOpenAI): The async API client. Point `base_url`
+                at a local OpenAI-compatible server to test without the API, and
+                set `max_retries=0` so retries are left to this class.
+            model (str, optional): The AI model to use. Defaults to "gpt-4o".
+            cache (ResponseCache, optional): Shared with AISummary. Defaults to None.
+            max_cache_temperature (float, optional): As AISummary. Defaults to 1.0.
+            max_concurrency (int, optional): Requests in flight at once. Defaults to 8.
+            requests_per_minute (float, optional): Request budget. Defaults to 500.
+            tokens_per_minute (float, optional): Token budget. Defaults to 30,000.
+            expected_output_tokens (int, optional): Completion tokens reserved per
+                request before its usage is known. Defaults to 500.
+            max_attempts (int, optional): Attempts per request, retrying 429s and
+                5xx errors with exponential backoff. Defaults to 6.
+            telemetry (Telemetry, optional): As AISummary.
+        """
+        logger.info("Instantiated async")
+        self.client = client
+        self.model = model
+        self.cache = cache
+        self.max_cache_temperature = max_cache_temperature
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.expected_output_tokens = expected_output_tokens
+        self.max_attempts = max_attempts
+        self.telemetry = telemetry or get_telemetry()
+
+    def _estimate_tokens(self, user_message:str, system_prompt:str) -> int:
+        # Roughly four characters per token for English text
+        return (len(user_message) + len(system_prompt)) // 4 + self.expected_output_tokens
+
+    async def _create(self, user_message:str, system_prompt:str, temperature:float, timings:dict) -> tuple:
+        """
+        Returns (response, attempts made), retrying retryable errors.
+
+        `timings` is filled in as it goes, so it is also usable when the
+        request fails: latency_s is the duration of the last API call alone,
+        queue_s the total time spent waiting on the rate limiter.
+        """
+        reserved = self._estimate_tokens(user_message, system_prompt)
+        timings["queue_s"] = 0.0
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception(is_retryable),
+            wait=wait_random_exponential(multiplier=1, max=60),
+            stop=stop_after_attempt(self.max_attempts),
+            reraise=True,
+        ):
+            with attempt:
+                waited = time.perf_counter()
+                await self.limiter.acquire(reserved)
+                start = time.perf_counter()
+                timings["queue_s"] += start - waited
+                try:
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        temperature=temperature,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_message},
+                        ],
+                    )
+                finally:
+                    timings["latency_s"] = time.perf_counter() - start
+        if response.usage is not None:
+            self.limiter.adjust(response.usage.total_tokens - reserved)
+        return response, attempt.retry_state.attempt_number
+
+    async def get_response(
+            self,
+            user_message:str,
+            system_prompt:str,
+            temperature:float=0.8,
+            use_cache:bool=True,
+            ) -> str:
+        """
+        Returns the completion for one request, as AISummary.get_response,
+        waiting for a concurrency slot and the rate-limit budget first.
+        """
+        start = time.perf_counter()
+        key, cached, cache_status = _cache_lookup(self, user_message, system_prompt, temperature, use_cache)
+        if cached is not None:
+            self.telemetry.record(
+                call="async_get_response", model=self.model, cache=cache_status,
+                latency_s=time.perf_counter() - start,
+            )
+            return cached
+
+        # latency_s covers the API call alone; waiting for a concurrency slot
+        # and the rate limiter is recorded as queue_s, and retry backoff in neither
+        timings = {"latency_s": None}
+        waited = time.perf_counter()
+        async with self.semaphore:
+            slot_wait = time.perf_counter() - waited
+            try:
+                response, attempts = await self._create(user_message, system_prompt, temperature, timings)
+            except Exception as error:
+                self.telemetry.record(
+                    call="async_get_response", model=self.model, cache=cache_status,
+                    latency_s=timings["latency_s"], queue_s=slot_wait + timings.get("queue_s", 0.0),
+                    error=repr(error),
+                )
+                raise
+        self.telemetry.record(
+            call="async_get_response", model=self.model, cache=cache_status,
+            latency_s=timings["latency_s"], queue_s=slot_wait + timings["queue_s"],
+            attempts=attempts, **_usage(response.usage),
+        )
+        content = response.choices[0].message.content
+        if key is not None and content is not None:
+            self.cache.set(key, content, model=self.model)
+        return content
+
+    async def batch_get_responses(
+            self,
+            user_messages:list,
+            system_prompt:str,
+            temperature:float=0.8,
+            use_cache:bool=True,
+            ) -> list:
+        """
+        Runs every prompt concurrently, within the concurrency limit and the
+        per-minute budgets. A failed item does not stop the others.
+
+        Args:
+            user_messages (list): One user message per item.
+            system_prompt (str): The system prompt shared by every item.
+            temperature (float, optional): Sampling temperature. Defaults to 0.8.
+            use_cache (bool, optional): As get_response. Defaults to True.
+
+        Returns:
+            list: One {"index", "response", "error"} dict per input, in input
+            order; `error` is None on success and `response` None on failure.
+        """
+        outcomes = await asyncio.gather(
+            *(
+                self.get_response(message, system_prompt, temperature, use_cache)
+                for message in user_messages
+            ),
+            return_exceptions=True,
         )
-        logging.info(response)
-        return response.choices[0].message.content
+        results = []
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error("Batch item %d failed: %r", index, outcome)
+                results.append({"index": index, "response": None, "error": outcome})
+            else:
+                results.append({"index": index, "response": outcome, "error": None})
+        return results
 
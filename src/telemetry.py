@@ -0,0 +1,205 @@
+"""
+Structured telemetry for LLM calls, written off the request path.
+
+Every call made through AISummary / AsyncAISummary is recorded as one dict:
+model, call type, latency, time to first token, prompt/completion tokens,
+cache status and error. Records are kept in memory for `summary()` and logged
+to the "check_ai.telemetry" logger.
+
+`setup_logging` routes all logging through a QueueHandler, so the request
+thread only enqueues a record; a QueueListener thread formats it and writes
+`logs/check_ai.log` (text) and `logs/check_ai_telemetry.jsonl` (one JSON
+record per call), appending rather than truncating on start-up.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+
+import numpy as np
+
+TELEMETRY_LOGGER = "check_ai.telemetry"
+
+_listener = None
+_telemetry = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the telemetry fields at the top level.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        payload.update(getattr(record, "telemetry", {"message": record.getMessage()}))
+        return json.dumps(payload, default=str)
+
+
+def _is_telemetry(record: logging.LogRecord) -> bool:
+    return hasattr(record, "telemetry")
+
+
+def setup_logging(log_dir: str = "logs", level: int = logging.INFO, max_bytes: int = 10_000_000) -> QueueListener:
+    """
+    Route logging through a background queue listener (once per process).
+
+    Args:
+        log_dir (str, optional): Folder for the log files. Defaults to "logs".
+        level (int, optional): Root logging level. Defaults to logging.INFO.
+        max_bytes (int, optional): Size at which each file is rotated. Defaults to 10 MB.
+
+    Returns:
+        QueueListener: The running listener (stopped automatically at exit).
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        log_dir = Path(log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+        text_handler = RotatingFileHandler(log_dir / "check_ai.log", maxBytes=max_bytes, backupCount=5)
+        text_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        text_handler.addFilter(lambda record: not _is_telemetry(record))
+
+        json_handler = RotatingFileHandler(
+            log_dir / "check_ai_telemetry.jsonl", maxBytes=max_bytes, backupCount=5
+        )
+        json_handler.setFormatter(JsonFormatter())
+        json_handler.addFilter(_is_telemetry)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(level)
+
+        _listener = QueueListener(log_queue, text_handler, json_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
+
+
+def _percentile(values: list, q: float):
+    return float(np.percentile(values, q)) if values else None
+
+
+class Telemetry:
+    def __init__(self, max_records: int = 10_000) -> None:
+        """
+        In-memory store of recent call records plus the telemetry logger.
+
+        Args:
+            max_records (int, optional): Records kept for summaries. Defaults to 10,000.
+        """
+        self.records = deque(maxlen=max_records)
+        self.logger = logging.getLogger(TELEMETRY_LOGGER)
+        self._lock = threading.Lock()
+
+    def record(self, **fields) -> None:
+        """
+        Store one call record and hand it to the (queued) telemetry logger.
+        """
+        fields.setdefault("timestamp", time.time())
+        with self._lock:
+            self.records.append(fields)
+        self.logger.info("llm_call", extra={"telemetry": fields})
+
+    def summary(self, since: float = None) -> dict:
+        """
+        Latency, time-to-first-token and token throughput over the stored
+        records, for capacity planning.
+
+        Args:
+            since (float, optional): Only records at or after this epoch time.
+
+        Returns:
+            dict: calls, errors, error_rate, cache_hit_rate, latency/ttft
+            p50 and p95 (seconds), prompt/completion token totals and
+            completion tokens per second of wall time (over calls that
+            reached the API).
+        """
+        with self._lock:
+            records = [r for r in self.records if since is None or r["timestamp"] >= since]
+
+        api_calls = [r for r in records if r.get("cache") != "hit" and not r.get("error")]
+        latencies = [r["latency_s"] for r in api_calls if r.get("latency_s") is not None]
+        ttfts = [r["ttft_s"] for r in api_calls if r.get("ttft_s") is not None]
+        prompt_tokens = sum(r.get("prompt_tokens") or 0 for r in api_calls)
+        completion_tokens = sum(r.get("completion_tokens") or 0 for r in api_calls)
+        # Throughput over wall time, so concurrent calls are not counted as
+        # sequential: a record's timestamp is taken when the call finishes
+        timed = [r for r in api_calls if r.get("latency_s") is not None]
+        wall_s = (
+            max(r["timestamp"] for r in timed) - min(r["timestamp"] - r["latency_s"] for r in timed)
+            if timed else None
+        )
+        errors = sum(1 for r in records if r.get("error"))
+        hits = sum(1 for r in records if r.get("cache") == "hit")
+
+        return {
+            "calls": len(records),
+            "errors": errors,
+            "error_rate": errors / len(records) if records else 0.0,
+            "cache_hit_rate": hits / len(records) if records else 0.0,
+            "latency_p50_s": _percentile(latencies, 50),
+            "latency_p95_s": _percentile(latencies, 95),
+            "ttft_p50_s": _percentile(ttfts, 50),
+            "ttft_p95_s": _percentile(ttfts, 95),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "completion_tokens_per_s": completion_tokens / wall_s if wall_s else None,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+
+def get_telemetry() -> Telemetry:
+    """
+    The process-wide Telemetry instance used by default.
+    """
+    global _telemetry
+    with _setup_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry()
+        return _telemetry
+
+
+def summarise_file(path: str = "logs/check_ai_telemetry.jsonl", since: float = None) -> dict:
+    """
+    `Telemetry.summary` over a telemetry log file, e.g. to combine the calls
+    of every app and batch process for capacity planning.
+    """
+    telemetry = Telemetry(max_records=None)
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if "timestamp" in record:
+                telemetry.records.append(record)
+    return telemetry.summary(since=since)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarise LLM call telemetry.")
+    parser.add_argument("--path", default="logs/check_ai_telemetry.jsonl")
+    parser.add_argument("--hours", type=float, default=None, help="Only the last N hours")
+    args = parser.parse_args()
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    for name, value in summarise_file(args.path, since=since).items():
+        print(f"{name:<26}: {value}")
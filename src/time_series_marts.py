@@ -0,0 +1,241 @@
+"""
+Workload time-series marts: contact volume, speed of answer and handle time
+per channel on a common hourly and daily grid.
+
+Each channel's cleaned rows are bucketed in one vectorised `resample` pass
+into additive per-bucket aggregates (contacts, and the sum and count of
+speed of answer and handle time), reindexed onto a shared UTC grid so empty
+hours are explicit zeros, and rolled up from hours to days. Daily rows also
+carry rolling 7- and 28-day totals and means. Charts and forecasts read
+`workload_hourly` / `workload_daily` directly instead of re-aggregating the
+raw tables.
+
+Because the aggregates are sums and counts, an incremental refresh only
+re-buckets the days from the refresh start onwards, and rolls those days
+forward from the 27 stored days before them.
+
+Speeds and handle times are in minutes: phone speed_of_answer, omni
+speed_to_answer, and for WhatsApp the delay from created_date to
+accept_time. Cases count contacts only.
+
+Every channel is bucketed on its created_date except phone, whose export has
+no creation timestamp: phone needs a call_date_time column (the export's
+"Call Date Time"). Without it the phone channel is left out of both tables
+and a warning is logged.
+"""
+
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HOURLY_TABLE = "workload_hourly"
+DAILY_TABLE = "workload_daily"
+ROLLING_DAYS = (7, 28)
+
+# Channel -> (table, event time column, speed of answer column, handle time column)
+CHANNELS = {
+    "whatsapp": ("whatsapp", "created_date", "accept_time", None),
+    "phone": ("phone", "call_date_time", "speed_of_answer", "handle_time"),
+    "omni": ("salesforce_omni_channel", "created_date", "speed_to_answer", "handle_time"),
+    "cases": ("cases", "created_date", None, None),
+}
+
+SUMS = ["contacts", "speed_sum_m", "speed_count", "handle_sum_m", "handle_count"]
+
+
+def _to_utc(series):
+    return pd.to_datetime(series, utc=True, errors="coerce", format="ISO8601")
+
+
+def _mark(timestamp):
+    # Matches the "YYYY-MM-DD HH:MM:SS+00:00" text to_sql stores timestamps as
+    return timestamp.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _table_exists(conn, table):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def _has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f'PRAGMA table_info("{table}")'))
+
+
+def read_channel(conn, channel, start=None):
+    """
+    One channel's events from `start` on as a frame indexed by UTC event
+    time, with speed_m and handle_m in minutes (NaN where not recorded).
+    None, with a warning, if the channel's table or event time column is
+    missing.
+    """
+    table, time_col, speed, handle = CHANNELS[channel]
+    if not _table_exists(conn, table):
+        logger.warning("Workload marts: no %s table, %s channel skipped", table, channel)
+        return None
+    if not _has_column(conn, table, time_col):
+        logger.warning(
+            "Workload marts: %s has no %s column, %s channel skipped", table, time_col, channel
+        )
+        return None
+
+    where, params = "", ()
+    if start is not None:
+        where, params = f' WHERE "{time_col}" >= ?', (_mark(start),)
+    df = pd.read_sql_query(
+        f"""SELECT "{time_col}" AS event_time,
+            {f'"{speed}"' if speed else "NULL"} AS speed,
+            {f'"{handle}"' if handle else "NULL"} AS handle
+        FROM "{table}"{where}""",
+        conn,
+        params=params,
+    )
+    event_time = _to_utc(df["event_time"])
+    if channel == "whatsapp":
+        speed_m = (_to_utc(df["speed"]) - event_time) / pd.Timedelta(minutes=1)
+    else:
+        speed_m = pd.to_numeric(df["speed"], errors="coerce")
+    handle_m = pd.to_numeric(df["handle"], errors="coerce")
+    events = pd.DataFrame(
+        {"speed_m": speed_m.to_numpy(), "handle_m": handle_m.to_numpy()},
+        index=pd.DatetimeIndex(event_time, name="bucket_start"),
+    )
+    return events[events.index.notna()]
+
+
+def bucket_hourly(events, grid):
+    """
+    Additive hourly aggregates of one channel's events, on `grid`.
+    """
+    frame = pd.DataFrame({
+        "contacts": 1,
+        "speed_sum_m": events["speed_m"],
+        "speed_count": events["speed_m"].notna(),
+        "handle_sum_m": events["handle_m"],
+        "handle_count": events["handle_m"].notna(),
+    }, index=events.index)
+    hourly = frame.resample("h").sum()
+    return hourly.reindex(grid, fill_value=0)
+
+
+def _mean(total, count):
+    return total / count.where(count > 0)
+
+
+def _with_means(df):
+    df["speed_mean_m"] = _mean(df["speed_sum_m"], df["speed_count"])
+    df["handle_mean_m"] = _mean(df["handle_sum_m"], df["handle_count"])
+    return df
+
+
+def _long(buckets):
+    frames = [df.assign(channel=channel) for channel, df in buckets.items()]
+    out = pd.concat(frames).rename_axis("bucket_start").reset_index()
+    for col in ["contacts", "speed_count", "handle_count"]:
+        out[col] = out[col].astype("int64")
+    return out[["channel", "bucket_start", *SUMS]]
+
+
+def _read_context(conn, start):
+    """
+    Stored daily sums for the 27 days before `start`, so the rolling windows
+    of the recomputed days carry on from them.
+    """
+    if start is None or not _table_exists(conn, DAILY_TABLE):
+        return None
+    first = start - pd.Timedelta(days=max(ROLLING_DAYS) - 1)
+    context = pd.read_sql_query(
+        f"""SELECT channel, bucket_start, {", ".join(SUMS)} FROM {DAILY_TABLE}
+        WHERE bucket_start >= ? AND bucket_start < ?""",
+        conn,
+        params=(_mark(first), _mark(start)),
+    )
+    context["bucket_start"] = _to_utc(context["bucket_start"])
+    return context
+
+
+def add_rolling(daily, context=None):
+    """
+    Rolling 7/28-day totals and means per channel over a contiguous daily
+    grid. Rows in `context` seed the windows and are dropped afterwards.
+    """
+    combined = daily.assign(_new=True)
+    if context is not None and not context.empty:
+        combined = pd.concat([context.assign(_new=False), combined], ignore_index=True)
+    combined = combined.sort_values(["channel", "bucket_start"], kind="stable", ignore_index=True)
+
+    grouped = combined.groupby("channel", sort=False)[SUMS]
+    for days in ROLLING_DAYS:
+        rolled = grouped.rolling(days, min_periods=1).sum().reset_index(level=0, drop=True)
+        combined[f"contacts_{days}d"] = rolled["contacts"].astype("int64")
+        combined[f"speed_mean_{days}d_m"] = _mean(rolled["speed_sum_m"], rolled["speed_count"])
+        combined[f"handle_mean_{days}d_m"] = _mean(rolled["handle_sum_m"], rolled["handle_count"])
+    return combined[combined["_new"]].drop(columns="_new").reset_index(drop=True)
+
+
+def build_time_series(conn, start=None) -> tuple:
+    """
+    Bucket every channel from `start` (a UTC day boundary; everything when
+    None) onto a shared hourly grid and roll it up to days.
+
+    Returns:
+        tuple: (hourly, daily) long-format DataFrames, or (None, None) if
+        there are no events.
+    """
+    events = {channel: read_channel(conn, channel, start) for channel in CHANNELS}
+    events = {channel: df for channel, df in events.items() if df is not None}
+    times = [df.index for df in events.values() if len(df)]
+    if not times:
+        return None, None
+
+    first = start if start is not None else min(t.min() for t in times).floor("D")
+    last = max(t.max() for t in times).floor("h")
+    grid = pd.date_range(first, last, freq="h", name="bucket_start")
+
+    hourly = {channel: bucket_hourly(df, grid) for channel, df in events.items()}
+    daily = {channel: df.resample("D").sum() for channel, df in hourly.items()}
+
+    hourly = _with_means(_long(hourly))
+    daily = add_rolling(_with_means(_long(daily)), _read_context(conn, start))
+    return hourly, daily
+
+
+def _write(conn, table, frame, start):
+    if start is None or not _table_exists(conn, table):
+        frame.to_sql(table, conn, if_exists="replace", index=False)
+        conn.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS "ix_{table}_bucket" ON {table} (channel, bucket_start)'
+        )
+        conn.commit()
+        return
+
+    staging = f"_staging_{table}"
+    frame.to_sql(staging, conn, if_exists="replace", index=False)
+    cols = ", ".join(f'"{c}"' for c in frame.columns)
+    with conn:
+        conn.execute(f"DELETE FROM {table} WHERE bucket_start >= ?", (_mark(start),))
+        conn.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {staging}")
+        conn.execute(f"DROP TABLE {staging}")
+
+
+def refresh_time_series(conn, since=None) -> int:
+    """
+    Rebuild workload_hourly and workload_daily, or with `since` (the earliest
+    previous watermark) re-bucket only the days from since's day onwards.
+
+    Returns:
+        int: Daily rows written.
+    """
+    start = None
+    if since is not None and _table_exists(conn, HOURLY_TABLE) and _table_exists(conn, DAILY_TABLE):
+        start = pd.Timestamp(since).tz_convert("UTC").floor("D")
+
+    hourly, daily = build_time_series(conn, start)
+    if hourly is None:
+        return 0
+    _write(conn, HOURLY_TABLE, hourly, start)
+    _write(conn, DAILY_TABLE, daily, start)
+    return len(daily)
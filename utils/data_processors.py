@@ -1,13 +1,196 @@
 # Load and clean function
+from pathlib import Path
 import pandas as pd
 import numpy as np
 
-def load_and_clean(path):
-    df = pd.read_csv(path)
-    
+# Salesforce exports timestamps as ISO-8601 with a fixed "+0000" offset
+SALESFORCE_TIMESTAMP = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+# Per-table cleaning schema, keyed by mart table name and using the cleaned
+# (lower_snake_case) column names:
+# - timestamps: column -> strptime format, parsed to UTC datetimes
+# - durations: column -> encoding, converted to minutes
+#     "hms": "HH:MM:SS" text with "-" for missing
+#     "seconds": numeric seconds (Salesforce AgentWork HandleTime/SpeedToAnswer)
+# - dtypes: column -> numeric dtype, so every chunk of a table comes out the
+#   same; values that don't fit (text, fractions for integers) become missing
+# - categories / ids: low-cardinality labels and 18-character Salesforce ids,
+#   stored compactly by `compact_frame`
+# Tables without a schema fall back to inferring from the column names.
+TABLE_SCHEMAS = {
+    "whatsapp": {
+        "timestamps": {
+            "created_date": SALESFORCE_TIMESTAMP,
+            "accept_time": SALESFORCE_TIMESTAMP,
+        },
+        "durations": {},
+        "dtypes": {"agent_message_count": "Int64"},
+        "categories": ["channel_name", "status", "agent_type"],
+        "ids": ["id", "case_id"],
+    },
+    "cases": {
+        "timestamps": {"created_date": SALESFORCE_TIMESTAMP},
+        "durations": {},
+        "dtypes": {"case_number": "Int64", "trader_id": "Int64"},
+        "categories": [
+            "origin",
+            "status",
+            "issue_type",
+            "callback_reason",
+            "team_taking_callback",
+        ],
+        "ids": ["id", "session_id"],
+    },
+    "salesforce_omni_channel": {
+        "timestamps": {
+            "created_date": SALESFORCE_TIMESTAMP,
+            "close_date_time": SALESFORCE_TIMESTAMP,
+            "assigned_date_time": SALESFORCE_TIMESTAMP,
+        },
+        "durations": {"handle_time": "seconds", "speed_to_answer": "seconds"},
+        "dtypes": {},
+        "categories": ["status", "queue_name"],
+        "ids": ["work_item_id"],
+    },
+    "phone": {
+        "timestamps": {},
+        "durations": {"handle_time": "hms", "speed_of_answer": "hms"},
+        "dtypes": {},
+        "categories": ["campaign", "call_type"],
+        "ids": ["session_id"],
+    },
+}
+
+
+def _parse_salesforce_timestamps(series):
+    """
+    Parse fixed-width "YYYY-MM-DDTHH:MM:SS.fff+0000" text by checking the
+    offset bytes and handing the rest to NumPy's C ISO-8601 parser.
+
+    Returns None if any present value is not in exactly that form, so the
+    caller can fall back to the general parser.
+    """
+    missing = series.isna().to_numpy()
+    try:
+        raw = series.where(~missing, "1970-01-01T00:00:00.000+0000").to_numpy(dtype="S29")
+    except UnicodeEncodeError:
+        return None
+
+    view = raw.view(np.uint8).reshape(-1, 29)
+    if not ((view[:, 23:28] == np.frombuffer(b"+0000", np.uint8)).all() and (view[:, 28] == 0).all()):
+        return None
+    try:
+        values = np.ascontiguousarray(view[:, :23]).view("S23").ravel().astype("datetime64[ms]")
+    except ValueError:
+        return None
+
+    values[missing] = np.datetime64("NaT")
+    return pd.Series(values.astype("datetime64[ns]"), index=series.index).dt.tz_localize("UTC")
+
+
+def _parse_timestamps(series, fmt):
+    """
+    Parse a text column against a known format, returning UTC datetimes.
+    Salesforce timestamps take a vectorised fixed-width path; other formats
+    (or malformed values) go through `pd.to_datetime` with the format given,
+    so pandas never falls back to per-element inference.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if series.dtype != object:
+        return pd.to_datetime(series, errors="coerce", utc=True)
+
+    if fmt == SALESFORCE_TIMESTAMP:
+        parsed = _parse_salesforce_timestamps(series)
+        if parsed is not None:
+            return parsed
+    return pd.to_datetime(series, format=fmt, errors="coerce", utc=True)
+
+
+def _hms_to_minutes(series):
+    """
+    Convert "HH:MM:SS" text to minutes by reading the digits straight out of
+    the fixed-width bytes; anything not in that exact form (e.g. fractional
+    seconds) goes through `pd.to_timedelta`. "-" placeholders become NaN.
+    """
+    if series.dtype != object:
+        return pd.to_timedelta(series, errors="coerce") / pd.Timedelta(minutes=1)
+
+    fixed = (series.str.len() == 8).to_numpy()
+    raw = series.where(fixed, "00:00:00").to_numpy(dtype="S8")
+    digits = raw.view(np.uint8).reshape(-1, 8).astype(np.int16) - ord("0")
+
+    colon = ord(":") - ord("0")
+    numeric = digits[:, [0, 1, 3, 4, 6, 7]]
+    parsed = (
+        fixed
+        & (digits[:, 2] == colon)
+        & (digits[:, 5] == colon)
+        & ((numeric >= 0) & (numeric <= 9)).all(axis=1)
+    )
+
+    hours = digits[:, 0] * 10 + digits[:, 1]
+    mins = digits[:, 3] * 10 + digits[:, 4]
+    secs = digits[:, 6] * 10 + digits[:, 7]
+    minutes = np.where(parsed, hours * 60 + mins + secs / 60, np.nan)
+
+    rest = ~parsed & series.notna().to_numpy() & (series != "-").to_numpy()
+    if rest.any():
+        minutes[rest] = pd.to_timedelta(series[rest], errors="coerce") / pd.Timedelta(minutes=1)
+    return pd.Series(minutes, index=series.index)
+
+
+def _duration_to_minutes(series, encoding):
+    if encoding == "hms":
+        return _hms_to_minutes(series)
+    if encoding == "seconds":
+        return pd.to_numeric(series, errors="coerce") / 60
+    raise ValueError(f"Unknown duration encoding: {encoding}")
+
+
+def _apply_schema(df, schema):
+    for col, fmt in schema["timestamps"].items():
+        if col in df.columns:
+            df[col] = _parse_timestamps(df[col], fmt)
+
+    for col, encoding in schema["durations"].items():
+        if col in df.columns:
+            df[col] = _duration_to_minutes(df[col], encoding)
+
+    # Date columns the schema doesn't know about still get the generic parse
+    declared = set(schema["timestamps"]) | set(schema["durations"])
+    for col in df.columns:
+        if 'date' in col and col not in declared:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    # Like timestamps and durations, values that don't fit the declared type
+    # become missing rather than failing the whole load
+    for col, dtype in schema["dtypes"].items():
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors="coerce")
+            if pd.api.types.is_integer_dtype(pd.api.types.pandas_dtype(dtype)):
+                values = values.where(values % 1 == 0)
+            df[col] = values.astype(dtype)
+
+    return df
+
+
+def clean_frame(df, schema=None):
+    """
+    Clean a raw export: normalise column names, then parse timestamps and
+    convert durations to minutes.
+
+    `schema` names an entry in TABLE_SCHEMAS (or is a schema dict); without
+    one, types are inferred from the column names.
+    """
     # Step 1: Clean column names
     df.columns = df.columns.str.lower().str.replace(' ', '_')
 
+    if isinstance(schema, str):
+        schema = TABLE_SCHEMAS.get(schema)
+    if schema is not None:
+        return _apply_schema(df, schema)
+
     # Step 2: Convert columns with 'date' or 'time' in their names to datetime (if not timedelta columns)
     for col in df.columns:
         if any(x in col for x in ['date', 'datetime']) and col not in ['handle_time', 'speed_of_answer', 'accept_time']:
@@ -22,3 +205,150 @@ def load_and_clean(path):
             df[col] = df[col].dt.total_seconds() / 60  # Convert to minutes
 
     return df
+
+
+def compact_frame(df, schema=None, report=True):
+    """
+    Shrink a cleaned table in memory:
+    - low-cardinality label columns become categoricals
+    - Salesforce id columns become Arrow-backed strings
+    - integers are downcast to the smallest type that holds them and
+      floats to float32
+
+    With `report=True` the before/after memory use is printed.
+    """
+    name = schema if isinstance(schema, str) else "table"
+    if isinstance(schema, str):
+        schema = TABLE_SCHEMAS.get(schema)
+    schema = schema or {}
+
+    before = df.memory_usage(deep=True).sum()
+
+    for col in schema.get("categories", []):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    for col in schema.get("ids", []):
+        if col in df.columns:
+            df[col] = df[col].astype("string[pyarrow]")
+
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    for col in df.select_dtypes(include="float").columns:
+        df[col] = pd.to_numeric(df[col], downcast="float")
+
+    after = df.memory_usage(deep=True).sum()
+    if report:
+        saving = 1 - after / before if before else 0.0
+        print(f"{name}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB ({saving:.0%} saved)")
+
+    return df
+
+
+def load_and_clean(path, schema=None, compact=False):
+    """
+    Load and clean a CSV export. The schema defaults to the TABLE_SCHEMAS
+    entry named after the file (e.g. data/whatsapp.csv -> "whatsapp").
+
+    `compact=True` also runs `compact_frame` and reports the memory saved.
+    """
+    schema = schema or Path(path).stem
+    df = clean_frame(pd.read_csv(path), schema=schema)
+    if compact:
+        df = compact_frame(df, schema=schema)
+    return df
+
+
+def load_and_clean_chunks(path, chunksize=50_000, schema=None):
+    """
+    Stream a CSV in fixed-size chunks, yielding each one cleaned exactly as
+    `load_and_clean` would clean the whole file.
+
+    Only one chunk is held in memory at a time, so peak memory is bounded by
+    `chunksize` rather than by the size of the export.
+    """
+    schema = schema or Path(path).stem
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield clean_frame(chunk, schema=schema)
+
+
+def load_and_clean_sql(conn, table, chunksize=50_000, schema=None):
+    """
+    Stream a table straight out of a SQLite database in cursor-sized batches,
+    yielding each batch cleaned as `load_and_clean` would clean the CSV export.
+
+    Numeric columns keep the types SQLite stored them with, and timestamps
+    are parsed once here rather than written to and re-read from CSV text.
+    Pass `schema` when the source table is named differently from the mart.
+    """
+    query = f'SELECT * FROM "{table}"'
+    for chunk in pd.read_sql_query(query, conn, chunksize=chunksize):
+        yield clean_frame(chunk, schema=schema or table)
+
+
+def _arrow_schema(chunk, schema=None):
+    """
+    Parquet schema for a cleaned table: the types its cleaning schema
+    guarantees (UTC timestamps, durations in minutes, declared dtypes, ids and
+    categories as strings), and for any other column the type inferred from
+    `chunk`, with all-null columns widened to strings.
+    """
+    import pyarrow as pa
+
+    if isinstance(schema, str):
+        schema = TABLE_SCHEMAS.get(schema)
+    schema = schema or {}
+    declared = {col: pa.timestamp("ns", tz="UTC") for col in schema.get("timestamps", {})}
+    declared.update({col: pa.float64() for col in schema.get("durations", {})})
+    declared.update({col: pa.from_numpy_dtype(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+                     for col, dtype in schema.get("dtypes", {}).items()})
+    declared.update({col: pa.string() for col in schema.get("categories", []) + schema.get("ids", [])})
+
+    inferred = pa.Schema.from_pandas(chunk, preserve_index=False)
+    fields = []
+    for field in inferred:
+        if field.name in declared:
+            field = field.with_type(declared[field.name])
+        elif pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields, metadata=inferred.metadata)
+
+
+def stage_parquet(chunks, path, schema=None):
+    """
+    Write cleaned chunks to a Parquet file as they pass through, yielding
+    each chunk on unchanged.
+
+    Every chunk is cast to one file schema built from the table's cleaning
+    schema (see `_arrow_schema`), so the staged file keeps the parsed
+    datetime and numeric types even when the first chunk has a column that
+    is all missing. `schema` names an entry in TABLE_SCHEMAS (or is a schema
+    dict); without one, the first chunk's types fix the file schema.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                writer = pq.ParquetWriter(path, _arrow_schema(chunk, schema))
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            )
+            yield chunk
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def load_parquet_chunks(path, chunksize=50_000):
+    """
+    Stream an already-cleaned Parquet file (see `stage_parquet`) in batches.
+    """
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
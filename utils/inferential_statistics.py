@@ -1,11 +1,175 @@
+import io
+
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 
-from scipy.stats import norm
-from scipy.stats import ttest_ind, mannwhitneyu
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import pandas as pd
+
+# scipy, matplotlib and seaborn are imported where they are used, so batch
+# jobs and workers that only need the test statistics don't pay for them.
+
+
+def _dominance_counts(a: np.ndarray, b: np.ndarray) -> tuple:
+    """
+    Count the (a, b) pairs with a > b and with a < b. NaNs are dropped from
+    both groups first (sorted, they would otherwise rank above every value).
+
+    Returns:
+    - (greater, less, pairs) as NumPy integers; tied pairs are in neither
+      count and pairs is the number of non-NaN pairs
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    a = a[~np.isnan(a)]
+    b_sorted = np.sort(b[~np.isnan(b)])
+    below = np.searchsorted(b_sorted, a, side="left")
+    above = len(b_sorted) - np.searchsorted(b_sorted, a, side="right")
+    return below.sum(), above.sum(), len(a) * len(b_sorted)
+
+
+BOOTSTRAP_STATISTICS = ("mean_difference", "median_difference", "cohen_d", "cliffs_delta")
+
+
+class _BootstrapSampler:
+    """
+    Draws batches of bootstrap replicates of one statistic from index matrices
+    (one row of resampled indices per replicate), so memory is bounded by
+    batch size x (n + m).
+
+    Group B is held sorted: Cliff's delta is then evaluated from per-row
+    resample counts and a cumulative count over sorted B, with no re-sorting.
+    """
+
+    def __init__(self, a: np.ndarray, b: np.ndarray, statistic: str) -> None:
+        self.a = np.asarray(a, dtype=float)
+        self.b = np.sort(np.asarray(b, dtype=float))
+        self.statistic = statistic
+        if statistic == "cliffs_delta":
+            self.below = np.searchsorted(self.b, self.a, side="left")
+            self.not_above = np.searchsorted(self.b, self.a, side="right")
 
+    def draw(self, size: int, seed) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        n, m = len(self.a), len(self.b)
+        idx_a = rng.integers(0, n, size=(size, n))
+        idx_b = rng.integers(0, m, size=(size, m))
+
+        if self.statistic == "cliffs_delta":
+            return self._cliffs_delta(idx_a, idx_b)
+
+        xa, xb = self.a[idx_a], self.b[idx_b]
+        if self.statistic == "mean_difference":
+            return xa.mean(axis=1) - xb.mean(axis=1)
+        if self.statistic == "median_difference":
+            return np.median(xa, axis=1) - np.median(xb, axis=1)
+        pooled_std = np.sqrt((xa.var(axis=1, ddof=1) + xb.var(axis=1, ddof=1)) / 2)
+        return (xa.mean(axis=1) - xb.mean(axis=1)) / pooled_std
+
+    def _cliffs_delta(self, idx_a: np.ndarray, idx_b: np.ndarray) -> np.ndarray:
+        size, n = idx_a.shape
+        m = idx_b.shape[1]
+        rows = np.arange(size)[:, None]
+        counts_a = np.bincount((idx_a + rows * n).ravel(), minlength=size * n).reshape(size, n)
+        counts_b = np.bincount((idx_b + rows * m).ravel(), minlength=size * m).reshape(size, m)
+
+        # cum_b[r, k] = number of resampled B values among the k smallest
+        cum_b = np.zeros((size, m + 1), dtype=np.int64)
+        np.cumsum(counts_b, axis=1, out=cum_b[:, 1:])
+
+        greater = (counts_a * cum_b[:, self.below]).sum(axis=1)
+        less = (counts_a * (m - cum_b[:, self.not_above])).sum(axis=1)
+        return (greater - less) / (n * m)
+
+
+_WORKER_SAMPLER = None
+
+
+def _init_bootstrap_worker(a: np.ndarray, b: np.ndarray, statistic: str) -> None:
+    global _WORKER_SAMPLER
+    _WORKER_SAMPLER = _BootstrapSampler(a, b, statistic)
+
+
+def _draw_in_worker(size: int, seed) -> np.ndarray:
+    return _WORKER_SAMPLER.draw(size, seed)
+
+
+def _jackknife_medians(x: np.ndarray) -> np.ndarray:
+    """
+    Leave-one-out medians of x from a single sort: removing sorted position i
+    shifts every later value down one place.
+    """
+    xs = np.sort(x)
+    removed = np.arange(len(xs))
+    remaining = len(xs) - 1
 
+    def value_at(k):
+        return np.where(k < removed, xs[k], xs[k + 1])
+
+    if remaining % 2:
+        return value_at(remaining // 2)
+    return (value_at(remaining // 2 - 1) + value_at(remaining // 2)) / 2
+
+
+def _jackknife_moments(x: np.ndarray) -> tuple:
+    """
+    Leave-one-out means and sample variances of x in closed form.
+    """
+    n = len(x)
+    mean = x.mean()
+    sq_dev = np.sum((x - mean) ** 2)
+    loo_mean = (n * mean - x) / (n - 1)
+    loo_var = (sq_dev - (x - mean) ** 2 * n / (n - 1)) / (n - 2)
+    return loo_mean, loo_var
+
+
+def _jackknife(a: np.ndarray, b: np.ndarray, statistic: str) -> np.ndarray:
+    """
+    Leave-one-out values of the statistic over all n + m observations, used for
+    the BCa acceleration. Each is computed in closed form in O((n+m) log(n+m)).
+    """
+    if statistic == "mean_difference":
+        return np.concatenate([
+            _jackknife_moments(a)[0] - b.mean(),
+            a.mean() - _jackknife_moments(b)[0],
+        ])
+    if statistic == "median_difference":
+        return np.concatenate([
+            _jackknife_medians(a) - np.median(b),
+            np.median(a) - _jackknife_medians(b),
+        ])
+    if statistic == "cohen_d":
+        mean_a, var_a = _jackknife_moments(a)
+        mean_b, var_b = _jackknife_moments(b)
+        return np.concatenate([
+            (mean_a - b.mean()) / np.sqrt((var_a + b.var(ddof=1)) / 2),
+            (a.mean() - mean_b) / np.sqrt((a.var(ddof=1) + var_b) / 2),
+        ])
+
+    n, m = len(a), len(b)
+    b_sorted, a_sorted = np.sort(b), np.sort(a)
+    # Pairs each observation wins / loses, and the totals over all pairs
+    wins_a = np.searchsorted(b_sorted, a, side="left")
+    losses_a = m - np.searchsorted(b_sorted, a, side="right")
+    wins_b = n - np.searchsorted(a_sorted, b, side="right")
+    losses_b = np.searchsorted(a_sorted, b, side="left")
+    greater, less = wins_a.sum(), losses_a.sum()
+    return np.concatenate([
+        (greater - wins_a - (less - losses_a)) / ((n - 1) * m),
+        (greater - wins_b - (less - losses_b)) / (n * (m - 1)),
+    ])
+
+
+def _point_estimate(a: np.ndarray, b: np.ndarray, statistic: str) -> float:
+    if statistic == "mean_difference":
+        return a.mean() - b.mean()
+    if statistic == "median_difference":
+        return np.median(a) - np.median(b)
+    if statistic == "cohen_d":
+        return (a.mean() - b.mean()) / np.sqrt((a.var(ddof=1) + b.var(ddof=1)) / 2)
+    greater, less, pairs = _dominance_counts(a, b)
+    return (greater - less) / pairs
 
 
 class IndependentGroupsAnalysis:
@@ -52,25 +216,23 @@ class IndependentGroupsAnalysis:
         Perform the Mann-Whitney U test, a non-parametric alternative to the t-test.
         Stores U-statistic and p-value.
         """
+        from scipy.stats import mannwhitneyu
+
         self.mu_U, self.p_value = mannwhitneyu(
             self.group_a, self.group_b, alternative="two-sided"
         )
 
     def _cliffs_delta(self) -> None:
         """
-        Fast Cliff's Delta using NumPy broadcasting (O(n log n)).
         Compute Cliff's Delta effect size, a non-parametric alternative to Cohen's d.
         It measures the probability that one group tends to have larger values than the other.
 
+        Sort-based and exact: group B is sorted once and `searchsorted` counts, for
+        every value in A, how many B values lie below and above it (ties count as
+        neither). O((n+m) log(n+m)) time and O(n+m) memory, with no n x m matrix.
+        Missing values are left out, so n and m are the non-NaN group sizes.
         """
-        a = self.group_a
-        b = self.group_b
-        n = len(a) * len(b)
-
-        # Use numpy broadcasting to speed up comparisons
-        diff_matrix = np.subtract.outer(a, b)
-        greater = np.sum(diff_matrix > 0)
-        less = np.sum(diff_matrix < 0)
+        greater, less, n = _dominance_counts(self.group_a, self.group_b)
 
         self.cliff_delta_effect_size = round((greater - less) / n, 3)
 
@@ -79,6 +241,8 @@ class IndependentGroupsAnalysis:
         Perform Welch's t-test (for unequal variances) on the two groups.
         Stores t-statistic and p-value.
         """
+        from scipy.stats import ttest_ind
+
         self.t_stat, self.p_value = ttest_ind(
             self.group_a, self.group_b, equal_var=False, alternative="two-sided"
         )
@@ -145,8 +309,8 @@ class IndependentGroupsAnalysis:
         print("Descriptive Statistics:\n" + "=" * 60)
         for label, group in zip(["Group A", "Group B"], [self.group_a, self.group_b]):
             print(f"{label}:")
-            print(f"  Min      : {min(group):.3f}")
-            print(f"  Max      : {max(group):.3f}")
+            print(f"  Min      : {np.min(group):.3f}")
+            print(f"  Max      : {np.max(group):.3f}")
             print(f"  n        : {len(group):.3f}")
             print(f"  Mean     : {np.mean(group):.3f}")
             print(f"  Median   : {np.median(group):.3f}")
@@ -185,6 +349,204 @@ class IndependentGroupsAnalysis:
             "median_group_b": self.median_b,
         }
 
+    def bootstrap_ci(
+        self,
+        statistic: str = "mean_difference",
+        n_resamples: int = 10_000,
+        confidence: float = 0.95,
+        method: str = "percentile",
+        batch_size: int = None,
+        n_jobs: int = 1,
+        random_state: int = None,
+    ) -> dict:
+        """
+        Bootstrap confidence interval for a difference between the groups.
+
+        Resamples are drawn in batches as index matrices and evaluated with
+        vectorised NumPy, optionally spread over a process pool. Every batch
+        gets its own child of one SeedSequence, so the interval depends only on
+        `random_state` and `batch_size`, not on `n_jobs`. NaNs are left out of
+        both groups.
+
+        Parameters:
+        - statistic: str - "mean_difference", "median_difference", "cohen_d" or "cliffs_delta"
+        - n_resamples: int - Number of bootstrap resamples (default 10,000)
+        - confidence: float - Confidence level (default 0.95)
+        - method: str - "percentile" or "bca" (bias-corrected and accelerated)
+        - batch_size: int - Resamples per batch; defaults to ~10M resampled values per batch
+        - n_jobs: int - Worker processes (default 1, in-process)
+        - random_state: int - Seed for reproducible intervals
+
+        Returns:
+        - dict with statistic, estimate, ci_lower, ci_upper, confidence, method, n_resamples
+        """
+        if statistic not in BOOTSTRAP_STATISTICS:
+            raise ValueError(f"statistic must be one of {BOOTSTRAP_STATISTICS}")
+        if method not in ("percentile", "bca"):
+            raise ValueError("method must be 'percentile' or 'bca'")
+
+        # Missing values are dropped once, so the estimate, the replicates and
+        # the jackknife all see the same sample (as _dominance_counts does)
+        a = np.asarray(self.group_a, dtype=float)
+        b = np.asarray(self.group_b, dtype=float)
+        a, b = a[~np.isnan(a)], b[~np.isnan(b)]
+        if batch_size is None:
+            batch_size = max(1, 10_000_000 // (len(a) + len(b)))
+
+        sizes = [batch_size] * (n_resamples // batch_size)
+        if n_resamples % batch_size:
+            sizes.append(n_resamples % batch_size)
+        seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+
+        if n_jobs == 1:
+            sampler = _BootstrapSampler(a, b, statistic)
+            batches = [sampler.draw(size, seed) for size, seed in zip(sizes, seeds)]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_init_bootstrap_worker,
+                initargs=(a, b, statistic),
+            ) as pool:
+                batches = list(pool.map(_draw_in_worker, sizes, seeds))
+        replicates = np.concatenate(batches)
+
+        estimate = _point_estimate(a, b, statistic)
+        tail = (1 - confidence) / 2
+        quantiles = np.array([tail, 1 - tail])
+
+        if method == "bca":
+            from scipy.stats import norm
+
+            below = np.mean(replicates < estimate) + 0.5 * np.mean(replicates == estimate)
+            z0 = norm.ppf(below)
+            jack = _jackknife(a, b, statistic)
+            spread = jack.mean() - jack
+            acceleration = np.sum(spread**3) / (6 * np.sum(spread**2) ** 1.5)
+            z = norm.ppf(quantiles)
+            quantiles = norm.cdf(z0 + (z0 + z) / (1 - acceleration * (z0 + z)))
+
+        ci_lower, ci_upper = np.quantile(replicates, quantiles)
+
+        result = {
+            "statistic": statistic,
+            "estimate": estimate,
+            "ci_lower": ci_lower,
+            "ci_upper": ci_upper,
+            "confidence": confidence,
+            "method": method,
+            "n_resamples": n_resamples,
+        }
+        if not hasattr(self, "bootstrap_results"):
+            self.bootstrap_results = {}
+        self.bootstrap_results[statistic] = result
+        return result
+
+    def permutation_test(
+        self,
+        statistic: str = "mean",
+        n_permutations: int = 100_000,
+        block_size: int = 2_000,
+        early_stop: bool = True,
+        stop_confidence: float = 0.999,
+        random_state: int = None,
+    ) -> dict:
+        """
+        Two-sided permutation test for a difference in means or medians, run by a
+        compiled, multi-threaded numba kernel (see utils.permutation_tests).
+
+        Permutations run in blocks. With `early_stop`, a Clopper-Pearson interval
+        for the p-value is checked after each block and the test stops as soon as
+        the interval lies entirely above or below alpha. Every permutation is
+        seeded from (random_state, permutation index), so results are
+        reproducible from the seed whatever the thread count.
+
+        Parameters:
+        - statistic: str - "mean" or "median"
+        - n_permutations: int - Maximum number of permutations (default 100,000)
+        - block_size: int - Permutations between early-stopping checks (default 2,000)
+        - early_stop: bool - Stop once the p-value is clearly above or below alpha
+        - stop_confidence: float - Confidence of the early-stopping interval (default 0.999)
+        - random_state: int - Seed for reproducible results
+
+        Returns:
+        - dict with statistic, observed_difference, p_value, n_permutations, stopped_early
+        """
+        from scipy.stats import beta
+
+        from utils import permutation_tests
+
+        kernels = {"mean": permutation_tests.MEAN, "median": permutation_tests.MEDIAN}
+        if statistic not in kernels:
+            raise ValueError("statistic must be 'mean' or 'median'")
+
+        a = np.asarray(self.group_a, dtype=float)
+        b = np.asarray(self.group_b, dtype=float)
+        if statistic == "mean":
+            observed = a.mean() - b.mean()
+        else:
+            observed = np.median(a) - np.median(b)
+
+        # The test is two-sided, so shuffling out the smaller group is enough
+        pooled = np.concatenate([a, b]) if len(a) <= len(b) else np.concatenate([b, a])
+        k = min(len(a), len(b))
+        seed = np.random.SeedSequence(random_state).generate_state(1, dtype=np.uint64)[0]
+
+        extreme = 0
+        done = 0
+        stopped_early = False
+        tail = (1 - stop_confidence) / 2
+        while done < n_permutations:
+            count = min(block_size, n_permutations - done)
+            extreme += permutation_tests.count_extreme(
+                pooled, k, kernels[statistic], abs(observed), seed, done, count
+            )
+            done += count
+
+            if early_stop and done < n_permutations:
+                lower = beta.ppf(tail, extreme, done - extreme + 1) if extreme else 0.0
+                upper = beta.ppf(1 - tail, extreme + 1, done - extreme) if extreme < done else 1.0
+                if upper < self.alpha or lower > self.alpha:
+                    stopped_early = True
+                    break
+
+        result = {
+            "statistic": statistic,
+            "observed_difference": observed,
+            "p_value": (extreme + 1) / (done + 1),
+            "n_permutations": done,
+            "stopped_early": stopped_early,
+        }
+        if not hasattr(self, "permutation_results"):
+            self.permutation_results = {}
+        self.permutation_results[statistic] = result
+        return result
+
+    def bin_distributions(self, bins: int = None) -> dict:
+        """
+        Pre-bin both groups on shared, equal-width edges (one `np.histogram`
+        pass per group) and keep the counts in `self.histogram`, so plots can
+        be redrawn or rendered in batch without touching the raw values again.
+
+        Parameters:
+        - bins: int - Number of bins (default sqrt of the combined group sizes)
+
+        Returns:
+        - dict with edges, counts_a, counts_b
+        """
+        if bins is None:
+            bins = int(np.sqrt(len(self.group_a) + len(self.group_b)))
+        self.histogram = histogram_counts(self.group_a, self.group_b, bins)
+        return self.histogram
+
+    def _annotation(self) -> str:
+        if hasattr(self, "cohen_d_effect_size"):
+            stat_label = f"t-value: {self.t_stat:.3f}"
+            effect_label = f"Effect Size d = {self.cohen_d_effect_size:.3f}"
+        else:
+            stat_label = f"U-statistic: {self.mu_U:.3f}"
+            effect_label = f"Cliff's Delta = {self.cliff_delta_effect_size:.3f}"
+        return f"p-value: {self.p_value:.3f}\n" f"{stat_label}\n" f"{effect_label}"
+
     def plot_distributions(
         self,
         label_a="Group A",
@@ -192,6 +554,7 @@ class IndependentGroupsAnalysis:
         xlabel="Value",
         title="Distribution of Values by Category (t-test)",
         density: bool = True,
+        bins: int = None,
     ) -> None:
         """
         Plot histogram of the distributions for both groups.
@@ -201,39 +564,116 @@ class IndependentGroupsAnalysis:
         - label_b: str - Label for group B
         - xlabel: str - X-axis label
         - title: str - Plot title
+        - bins: int - Number of bins (default sqrt of the combined group sizes)
         """
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         sns.set_theme(style="whitegrid")
 
         fig, ax = plt.subplots(figsize=(9, 6))
+        _draw_histograms(
+            ax,
+            self.bin_distributions(bins),
+            label_a,
+            label_b,
+            xlabel,
+            title,
+            self._annotation(),
+            density,
+        )
+        sns.despine()
 
-        ax.hist(
-            self.group_a,
-            edgecolor="white",
-            alpha=0.8,
-            label=label_a,
+        plt.tight_layout()
+        plt.show()
+
+    def save_distributions(
+        self,
+        path=None,
+        label_a="Group A",
+        label_b="Group B",
+        xlabel="Value",
+        title="Distribution of Values by Category (t-test)",
+        density: bool = True,
+        bins: int = None,
+        format: str = "png",
+        dpi: int = 100,
+    ):
+        """
+        Render the histogram plot without a display, to a file or to bytes.
+
+        Uses the stored `self.histogram` counts when present (see
+        `bin_distributions`), binning the groups first otherwise.
+
+        Parameters:
+        - path: str or Path - File to write; when None the image bytes are returned
+        - bins: int - Re-bin with this many bins instead of using stored counts
+        - format: str - Image format (default "png")
+        - dpi: int - Resolution (default 100)
+        - other parameters as `plot_distributions`
+
+        Returns:
+        - bytes when `path` is None, else None
+        """
+        if bins is not None or not hasattr(self, "histogram"):
+            self.bin_distributions(bins)
+        return render_histograms(
+            self.histogram,
+            path=path,
+            label_a=label_a,
+            label_b=label_b,
+            xlabel=xlabel,
+            title=title,
+            annotation=self._annotation(),
             density=density,
-            bins=int(np.sqrt(len(self.group_a) + len(self.group_b))),
+            format=format,
+            dpi=dpi,
         )
+
+
+def histogram_counts(group_a: np.ndarray, group_b: np.ndarray, bins: int) -> dict:
+    """
+    Bin two groups on the same equal-width edges spanning both.
+
+    Returns:
+    - dict with edges (bins + 1 values), counts_a and counts_b
+    """
+    group_a = np.asarray(group_a, dtype=float)
+    group_b = np.asarray(group_b, dtype=float)
+    value_range = (
+        min(np.nanmin(group_a), np.nanmin(group_b)),
+        max(np.nanmax(group_a), np.nanmax(group_b)),
+    )
+    counts_a, edges = np.histogram(group_a[~np.isnan(group_a)], bins=bins, range=value_range)
+    counts_b, _ = np.histogram(group_b[~np.isnan(group_b)], bins=bins, range=value_range)
+    return {"edges": edges, "counts_a": counts_a, "counts_b": counts_b}
+
+
+def _draw_histograms(ax, histogram, label_a, label_b, xlabel, title, annotation, density) -> None:
+    """
+    Draw pre-binned counts as the two overlaid histograms of `plot_distributions`.
+    """
+    edges = histogram["edges"]
+    for counts, label, alpha in (
+        (histogram["counts_a"], label_a, 0.8),
+        (histogram["counts_b"], label_b, 0.4),
+    ):
+        # One weighted "sample" per bin reproduces the histogram of the raw values
         ax.hist(
-            self.group_b,
+            edges[:-1],
+            bins=edges,
+            weights=counts,
             edgecolor="white",
-            alpha=0.4,
-            label=label_b,
+            alpha=alpha,
+            label=label,
             density=density,
-            bins=int(np.sqrt(len(self.group_a) + len(self.group_b))),
         )
 
-        if hasattr(self, "cohen_d_effect_size"):
-            stat_label = f"t-value: {self.t_stat:.3f}"
-            effect_label = f"Effect Size d = {self.cohen_d_effect_size:.3f}"
-        else:
-            stat_label = f"U-statistic: {self.mu_U:.3f}"
-            effect_label = f"Cliff's Delta = {self.cliff_delta_effect_size:.3f}"
-
+    if annotation:
         ax.text(
             0.02,
             0.95,
-            f"p-value: {self.p_value:.3f}\n" f"{stat_label}\n" f"{effect_label}",
+            annotation,
             transform=ax.transAxes,
             fontsize=12,
             fontweight="bold",
@@ -243,13 +683,424 @@ class IndependentGroupsAnalysis:
             ),
         )
 
-        ax.set_title(title, fontsize=14, weight="bold")
-        ax.set_xlabel(xlabel, fontsize=12)
-        ax.set_ylabel("", fontsize=12)
-        ax.legend(title="Group")
+    ax.set_title(title, fontsize=14, weight="bold")
+    ax.set_xlabel(xlabel, fontsize=12)
+    ax.set_ylabel("", fontsize=12)
+    ax.legend(title="Group")
 
-        sns.despine()
 
-        plt.tight_layout()
-        plt.show()
+def render_histograms(
+    histogram: dict,
+    path=None,
+    label_a="Group A",
+    label_b="Group B",
+    xlabel="Value",
+    title="Distribution of Values by Category",
+    annotation: str = None,
+    density: bool = True,
+    format: str = "png",
+    dpi: int = 100,
+):
+    """
+    Render pre-binned counts (see `histogram_counts`) headlessly.
+
+    Draws on a bare `matplotlib.figure.Figure`, so no pyplot state, GUI
+    backend or display is involved and figures are freed as soon as they go
+    out of scope; safe to call in a loop or in worker processes.
+
+    Returns:
+    - the image bytes when `path` is None, else None
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(9, 6), layout="tight")
+    ax = fig.subplots()
+    ax.grid(alpha=0.3)
+    ax.spines[["top", "right"]].set_visible(False)
+    _draw_histograms(ax, histogram, label_a, label_b, xlabel, title, annotation, density)
+
+    if path is not None:
+        fig.savefig(path, format=format, dpi=dpi)
+        return None
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=format, dpi=dpi)
+    return buffer.getvalue()
+
+
+def welch_from_moments(mean_a, var_a, n_a, mean_b, var_b, n_b) -> tuple:
+    """
+    Welch's t-test from summary moments (scalars or arrays).
+
+    Returns:
+    - (t_statistic, two-sided p_value)
+    """
+    from scipy.stats import t as t_dist
+
+    se2_a = var_a / n_a
+    se2_b = var_b / n_b
+    t_stat = (mean_a - mean_b) / np.sqrt(se2_a + se2_b)
+    dof = (se2_a + se2_b) ** 2 / (se2_a**2 / (n_a - 1) + se2_b**2 / (n_b - 1))
+    return t_stat, 2 * t_dist.sf(np.abs(t_stat), dof)
+
+
+def mannwhitney_normal_p_value(u_stat, n_a, n_b, tie_term):
+    """
+    Two-sided Mann-Whitney p-value from U by the normal approximation, with
+    tie and continuity correction (as scipy's "asymptotic" method).
+    """
+    from scipy.stats import norm
+
+    nm = n_a * n_b
+    total = n_a + n_b
+    sigma = np.sqrt(nm / 12 * ((total + 1) - tie_term / (total * (total - 1))))
+    u_max = np.maximum(u_stat, nm - u_stat)
+    z = (u_max - nm / 2 - 0.5) / sigma
+    return np.clip(2 * norm.sf(z), 0, 1)
+
+
+def _adjust_pvalues(p_values: np.ndarray, method: str) -> np.ndarray:
+    """
+    Adjust p-values for multiple testing.
+
+    Parameters:
+    - p_values: np.ndarray - Raw p-values
+    - method: str - "holm" (family-wise error) or "fdr_bh" (Benjamini-Hochberg false discovery rate)
+    """
+    p = np.asarray(p_values, dtype=float)
+    m = len(p)
+    order = np.argsort(p)
+    ranked = p[order]
+
+    if method == "holm":
+        adjusted = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    elif method == "fdr_bh":
+        adjusted = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError("method must be 'holm' or 'fdr_bh'")
+
+    result = np.empty(m)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+
+def _tie_term(sorted_values: np.ndarray) -> float:
+    """
+    Sum of t^3 - t over groups of tied values, for the Mann-Whitney variance.
+    """
+    _, counts = np.unique(sorted_values, return_counts=True)
+    return float(np.sum(counts.astype(float) ** 3 - counts))
+
+
+COMPARISON_COLUMNS = [
+    "group_a",
+    "group_b",
+    "against_rest",
+    "n_a",
+    "n_b",
+    "mean_a",
+    "mean_b",
+    "median_a",
+    "median_b",
+    "mannwhitney_u",
+    "t_statistic",
+    "welch_p_value",
+    "cohen_d",
+    "mannwhitney_p_value",
+    "cliffs_delta",
+    "welch_p_adjusted",
+    "mannwhitney_p_adjusted",
+    "significant_welch",
+    "significant_mannwhitney",
+]
+
+
+class SegmentComparison:
+    """
+    Compare one measure across many segments in a single pass, e.g. handle time
+    by issue_type, campaign or channel.
+
+    For every requested pair of segments (or every segment against the rest) it
+    runs Welch's t-test, the Mann-Whitney U test (normal approximation with tie
+    and continuity correction), Cohen's d and Cliff's Delta, then corrects the
+    p-values of each test for multiple comparisons.
+
+    Each segment is sorted and its moments computed once in `load_data`, and
+    reused for every comparison it takes part in. "Against the rest" never
+    builds the complement: its counts, moments and median are derived from the
+    pooled sorted values minus the segment's own.
+    """
+
+    def __init__(self):
+        pass
+
+    def load_data(
+        self,
+        df: pd.DataFrame,
+        value_col: str,
+        group_col: str,
+        alpha: float = 0.05,
+        min_size: int = 2,
+    ) -> None:
+        """
+        Load a long-format DataFrame and precompute per-segment statistics.
+
+        Parameters:
+        - df: pd.DataFrame - One row per observation
+        - value_col: str - Column holding the measure (e.g. "handle_time")
+        - group_col: str - Column holding the segment label (e.g. "issue_type")
+        - alpha: float - Significance level after correction (default 0.05)
+        - min_size: int - Segments with fewer observations are skipped (default 2)
+
+        Raises ValueError if no segment has at least `min_size` observations.
+        """
+        data = df[[group_col, value_col]].dropna()
+        self.alpha = alpha
+        self.min_size = min_size
+        self.segments = {}
+        for name, values in data.groupby(group_col, observed=True)[value_col]:
+            values = np.sort(values.to_numpy(dtype=float))
+            if len(values) < min_size:
+                continue
+            self.segments[name] = self._moments(values)
+            self.segments[name].update(self._value_counts(values))
+        if not self.segments:
+            raise ValueError(
+                f"No segment of '{group_col}' has at least {min_size} non-missing '{value_col}' values"
+            )
+
+        pooled = np.sort(np.concatenate([seg["values"] for seg in self.segments.values()]))
+        self.pooled = self._moments(pooled)
+        self.pooled["tie_term"] = _tie_term(pooled)
+
+    @staticmethod
+    def _moments(sorted_values: np.ndarray) -> dict:
+        n = len(sorted_values)
+        mean = sorted_values.mean()
+        return {
+            "values": sorted_values,
+            "n": n,
+            "mean": mean,
+            "m2": np.sum((sorted_values - mean) ** 2),
+            "median": np.median(sorted_values),
+        }
+
+    @staticmethod
+    def _value_counts(sorted_values: np.ndarray) -> dict:
+        # Distinct values, their counts and how many values lie below each,
+        # so pairwise ranks and ties come from searches over the distinct values
+        uniques, counts = np.unique(sorted_values, return_counts=True)
+        return {
+            "uniques": uniques,
+            "counts": counts,
+            "below": np.concatenate([[0], np.cumsum(counts)[:-1]]),
+            "tie_term": float(np.sum(counts.astype(float) ** 3 - counts)),
+        }
+
+    def _rest(self, name) -> dict:
+        """
+        Moments of every segment except `name`, from the pooled totals.
+        """
+        seg, pooled = self.segments[name], self.pooled
+        n = pooled["n"] - seg["n"]
+        mean = (pooled["mean"] * pooled["n"] - seg["mean"] * seg["n"]) / n
+        m2 = pooled["m2"] - seg["m2"] - (seg["mean"] - mean) ** 2 * seg["n"] * n / pooled["n"]
+
+        # The rest's values at or below each pooled value, to locate its median
+        rest_le = np.searchsorted(pooled["values"], pooled["values"], side="right") - np.searchsorted(
+            seg["values"], pooled["values"], side="right"
+        )
+
+        def kth(k):
+            return pooled["values"][np.searchsorted(rest_le, k + 1)]
+
+        median = kth(n // 2) if n % 2 else (kth(n // 2 - 1) + kth(n // 2)) / 2
+        return {"n": n, "mean": mean, "m2": max(m2, 0.0), "median": median}
+
+    def _u_statistic(self, name_a, name_b=None) -> tuple:
+        """
+        Mann-Whitney U for segment A and the tie term of the combined sample.
+        With no B, compares A against the rest using the pooled sorted values.
+        """
+        a = self.segments[name_a]["values"]
+        if name_b is None:
+            pooled = self.pooled["values"]
+            below = np.searchsorted(pooled, a, side="left") - np.searchsorted(a, a, side="left")
+            not_above = np.searchsorted(pooled, a, side="right") - np.searchsorted(a, a, side="right")
+            return below.sum() + 0.5 * (not_above - below).sum(), self.pooled["tie_term"]
+
+        # Each distinct value of A, located once among the distinct values of B
+        seg_a, seg_b = self.segments[name_a], self.segments[name_b]
+        pos = np.searchsorted(seg_b["uniques"], seg_a["uniques"])
+        found = np.minimum(pos, len(seg_b["uniques"]) - 1)
+        tied = np.where(seg_b["uniques"][found] == seg_a["uniques"], seg_b["counts"][found], 0)
+        below = np.append(seg_b["below"], seg_b["n"])[pos]
+        u_stat = np.sum(seg_a["counts"] * (below + 0.5 * tied))
+
+        # Tie groups of the combined sample: (c_a + c_b)^3 - (c_a + c_b) per shared value
+        shared = 3.0 * seg_a["counts"] * tied * (seg_a["counts"] + tied)
+        return u_stat, seg_a["tie_term"] + seg_b["tie_term"] + float(shared.sum())
+
+    def test_pairs(
+        self,
+        pairs: list = None,
+        against_rest: bool = False,
+        correction: str = "fdr_bh",
+    ) -> pd.DataFrame:
+        """
+        Run every comparison and return a tidy results frame (also kept for `results`).
+        The frame is empty when there is nothing to compare (fewer than two segments).
+        Comparisons against the rest have `against_rest` set and "rest" as group_b.
+
+        Parameters:
+        - pairs: list - (segment_a, segment_b) tuples; defaults to every pair of segments.
+          Raises ValueError if a pair names a segment that was not loaded
+        - against_rest: bool - Compare each segment with all other segments combined instead
+        - correction: str - "fdr_bh" (default) or "holm", applied to each test's p-values
+        """
+        if against_rest:
+            # A lone segment has no rest to compare with
+            comparisons = [(name, None) for name in self.segments] if len(self.segments) > 1 else []
+        else:
+            comparisons = pairs if pairs is not None else list(combinations(self.segments, 2))
+            missing = [name for pair in comparisons for name in pair if name not in self.segments]
+            if missing:
+                raise ValueError(
+                    f"No segment {', '.join(map(repr, dict.fromkeys(missing)))} to compare: "
+                    f"unknown, or dropped for having fewer than {self.min_size} observations"
+                )
+        if not comparisons:
+            self.comparisons = pd.DataFrame(columns=COMPARISON_COLUMNS)
+            return self.comparisons
+
+        rows = []
+        for name_a, name_b in comparisons:
+            seg_a = self.segments[name_a]
+            seg_b = self._rest(name_a) if name_b is None else self.segments[name_b]
+            u_stat, tie_term = self._u_statistic(name_a, name_b)
+            rows.append({
+                "group_a": name_a,
+                "group_b": "rest" if name_b is None else name_b,
+                "against_rest": name_b is None,
+                "n_a": seg_a["n"],
+                "n_b": seg_b["n"],
+                "mean_a": seg_a["mean"],
+                "mean_b": seg_b["mean"],
+                "median_a": seg_a["median"],
+                "median_b": seg_b["median"],
+                "var_a": seg_a["m2"] / (seg_a["n"] - 1),
+                "var_b": seg_b["m2"] / (seg_b["n"] - 1),
+                "mannwhitney_u": u_stat,
+                "tie_term": tie_term,
+            })
+        out = pd.DataFrame(rows)
+
+        # Welch's t-test and Cohen's d, vectorised over all comparisons
+        out["t_statistic"], out["welch_p_value"] = welch_from_moments(
+            out["mean_a"], out["var_a"], out["n_a"], out["mean_b"], out["var_b"], out["n_b"]
+        )
+        out["cohen_d"] = (out["mean_a"] - out["mean_b"]) / np.sqrt((out["var_a"] + out["var_b"]) / 2)
+
+        # Mann-Whitney (normal approximation) and Cliff's Delta from the same U
+        nm = out["n_a"] * out["n_b"]
+        out["mannwhitney_p_value"] = mannwhitney_normal_p_value(
+            out["mannwhitney_u"], out["n_a"], out["n_b"], out["tie_term"]
+        )
+        out["cliffs_delta"] = (2 * out["mannwhitney_u"] - nm) / nm
+
+        out["welch_p_adjusted"] = _adjust_pvalues(out["welch_p_value"], correction)
+        out["mannwhitney_p_adjusted"] = _adjust_pvalues(out["mannwhitney_p_value"], correction)
+        out["significant_welch"] = out["welch_p_adjusted"] < self.alpha
+        out["significant_mannwhitney"] = out["mannwhitney_p_adjusted"] < self.alpha
+
+        self.comparisons = out[COMPARISON_COLUMNS]
+        return self.comparisons
+
+    def results(self) -> pd.DataFrame:
+        """
+        Return the results frame from the last `test_pairs` call.
+        """
+        return self.comparisons
+
+    def segment_histograms(self, bins: int = 50) -> dict:
+        """
+        Bin every segment once on shared edges spanning all of them, keeping
+        the counts in `self.histograms` (with the pooled counts under None,
+        from which each "rest" histogram is a subtraction).
+
+        Parameters:
+        - bins: int - Number of equal-width bins (default 50)
+
+        Returns:
+        - dict with edges and counts (segment -> bin counts)
+        """
+        pooled = self.pooled["values"]
+        value_range = (pooled[0], pooled[-1])
+        counts = {
+            name: np.histogram(seg["values"], bins=bins, range=value_range)[0]
+            for name, seg in self.segments.items()
+        }
+        counts[None] = np.histogram(pooled, bins=bins, range=value_range)[0]
+        self.histograms = {
+            "edges": np.histogram_bin_edges(pooled, bins=bins, range=value_range),
+            "counts": counts,
+        }
+        return self.histograms
+
+    def save_pair_plots(
+        self,
+        directory,
+        xlabel: str = "Value",
+        bins: int = 50,
+        density: bool = True,
+        format: str = "png",
+        dpi: int = 100,
+    ) -> list:
+        """
+        Render a histogram plot for every comparison from the last `test_pairs`
+        call into `directory`, headlessly and from stored bin counts.
+
+        Parameters:
+        - directory: str or Path - Output folder (created if missing)
+        - xlabel: str - X-axis label
+        - bins: int - Number of bins, shared by every plot (default 50)
+        - format: str - Image format (default "png")
+        - dpi: int - Resolution (default 100)
+
+        Returns:
+        - list of the written file paths, in the order of `results()`
+        """
+        from pathlib import Path
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        if getattr(self, "histograms", None) is None or len(self.histograms["edges"]) != bins + 1:
+            self.segment_histograms(bins)
+        edges, counts = self.histograms["edges"], self.histograms["counts"]
+
+        paths = []
+        for row in self.comparisons.itertuples(index=False):
+            counts_a = counts[row.group_a]
+            if row.against_rest:
+                counts_b = counts[None] - counts_a
+            else:
+                counts_b = counts[row.group_b]
 
+            path = directory / f"{row.group_a}_vs_{row.group_b}.{format}".replace(" ", "_").replace("/", "-")
+            render_histograms(
+                {"edges": edges, "counts_a": counts_a, "counts_b": counts_b},
+                path=path,
+                label_a=str(row.group_a),
+                label_b=str(row.group_b),
+                xlabel=xlabel,
+                title=f"{xlabel}: {row.group_a} vs {row.group_b}",
+                annotation=(
+                    f"Welch p (adj.): {row.welch_p_adjusted:.3f}\n"
+                    f"Mann-Whitney p (adj.): {row.mannwhitney_p_adjusted:.3f}\n"
+                    f"d = {row.cohen_d:.3f} | Cliff's Delta = {row.cliffs_delta:.3f}"
+                ),
+                density=density,
+                format=format,
+                dpi=dpi,
+            )
+            paths.append(path)
+        return paths
@@ -0,0 +1,88 @@
+"""
+Compiled permutation-test kernels for `IndependentGroupsAnalysis.permutation_test`.
+
+Kept in their own module so numba (and its JIT compile) is only loaded when a
+permutation test is actually run.
+"""
+
+import numba
+import numpy as np
+from numba import njit, prange
+
+MEAN = 0
+MEDIAN = 1
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_TO_UNIT = 1.0 / 9007199254740992.0  # 2**-53
+
+
+@njit(inline="always")
+def _splitmix64(state):
+    """
+    Advance a splitmix64 state, returning (new_state, random 64-bit value).
+    """
+    state = state + _GOLDEN
+    z = state
+    z = (z ^ (z >> np.uint64(30))) * _MIX_1
+    z = (z ^ (z >> np.uint64(27))) * _MIX_2
+    return state, z ^ (z >> np.uint64(31))
+
+
+@njit(cache=True)
+def _statistic(buffer, k, n_total, total, statistic):
+    """
+    Difference between the first `k` values of `buffer` and the rest.
+    """
+    if statistic == MEAN:
+        head = 0.0
+        for i in range(k):
+            head += buffer[i]
+        return head / k - (total - head) / (n_total - k)
+    return np.median(buffer[:k]) - np.median(buffer[k:])
+
+
+def count_extreme(pooled, k, statistic, observed, seed, start, count):
+    """
+    Run permutations `start` .. `start + count - 1` and count those whose
+    absolute statistic is at least `observed`.
+
+    Each permutation draws the `k` values of the smaller group with a partial
+    Fisher-Yates shuffle, from its own splitmix64 stream seeded by (seed,
+    permutation index). Each thread undoes its swaps afterwards, so the result
+    depends only on the seed and permutation indices, never on how the work
+    was split across threads.
+    """
+    return _count_extreme(
+        pooled, k, statistic, observed, seed, start, count, numba.get_num_threads()
+    )
+
+
+@njit(parallel=True, cache=True)
+def _count_extreme(pooled, k, statistic, observed, seed, start, count, n_threads):
+    n_total = len(pooled)
+    total = pooled.sum()
+    tolerance = 1e-12 * max(1.0, abs(observed))
+    extreme = np.zeros(n_threads, dtype=np.int64)
+
+    for thread in prange(n_threads):
+        buffer = pooled.copy()
+        swaps = np.empty(k, dtype=np.int64)
+        for offset in range(thread, count, n_threads):
+            state = np.uint64(seed) ^ (np.uint64(start + offset) * _GOLDEN)
+            for i in range(k):
+                state, value = _splitmix64(state)
+                j = i + np.int64((value >> np.uint64(11)) * _TO_UNIT * (n_total - i))
+                swaps[i] = j
+                buffer[i], buffer[j] = buffer[j], buffer[i]
+
+            if abs(_statistic(buffer, k, n_total, total, statistic)) >= observed - tolerance:
+                extreme[thread] += 1
+
+            # Undo the swaps in reverse to restore the original order
+            for i in range(k - 1, -1, -1):
+                j = swaps[i]
+                buffer[i], buffer[j] = buffer[j], buffer[i]
+
+    return extreme.sum()
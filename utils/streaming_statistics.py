@@ -0,0 +1,340 @@
+import numpy as np
+import pandas as pd
+
+from utils.inferential_statistics import welch_from_moments, mannwhitney_normal_p_value
+
+
+class RunningMoments:
+    """
+    Single-pass, mergeable count, mean, central moments (up to the fourth), min
+    and max.
+
+    Each chunk's moments are computed with NumPy and folded in with the
+    pairwise update formulas of Chan et al. / Pébay, so the accumulator never
+    holds more than one chunk, and accumulators built on separate partitions
+    can be merged exactly.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Fold a chunk of values into the running moments.
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        chunk = RunningMoments()
+        chunk.n = len(values)
+        chunk.mean = values.mean()
+        dev = values - chunk.mean
+        chunk.m2 = np.sum(dev**2)
+        chunk.m3 = np.sum(dev**3)
+        chunk.m4 = np.sum(dev**4)
+        chunk.min = values.min()
+        chunk.max = values.max()
+        self.merge(chunk)
+
+    def merge(self, other: "RunningMoments") -> None:
+        """
+        Combine another accumulator (e.g. from another partition) into this one.
+        """
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return
+
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+
+        m4 = (
+            self.m4
+            + other.m4
+            + delta**4 * na * nb * (na**2 - na * nb + nb**2) / n**3
+            + 6 * delta**2 * (na**2 * other.m2 + nb**2 * self.m2) / n**2
+            + 4 * delta * (na * other.m3 - nb * self.m3) / n
+        )
+        m3 = (
+            self.m3
+            + other.m3
+            + delta**3 * na * nb * (na - nb) / n**2
+            + 3 * delta * (na * other.m2 - nb * self.m2) / n
+        )
+        m2 = self.m2 + other.m2 + delta**2 * na * nb / n
+
+        self.n = n
+        self.mean = self.mean + delta * nb / n
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1)
+
+    @property
+    def skew(self) -> float:
+        # Biased estimator, as scipy.stats.skew's default
+        return np.sqrt(self.n) * self.m3 / self.m2**1.5
+
+    @property
+    def kurtosis(self) -> float:
+        # Excess (Fisher) kurtosis, as scipy.stats.kurtosis's default
+        return self.n * self.m4 / self.m2**2 - 3
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative-accuracy guarantee (DDSketch).
+
+    Values fall into logarithmic buckets, bucket k covering
+    (gamma^(k-1), gamma^k] with gamma = (1 + a) / (1 - a), so any quantile is
+    returned to within relative error `a`. Two sketches with the same accuracy
+    merge by adding bucket counts, and the buckets double as a shared rank
+    histogram for comparing groups.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.min_value = min_value
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _add(self, store: dict, magnitudes: np.ndarray) -> None:
+        keys = np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64)
+        for key, count in zip(*np.unique(keys, return_counts=True)):
+            store[key] = store.get(key, 0) + int(count)
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Add a chunk of values to the sketch.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self._add(self.positive, values[values > self.min_value])
+        self._add(self.negative, -values[values < -self.min_value])
+        self.zero_count += int(np.sum(np.abs(values) <= self.min_value))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """
+        Combine another sketch with the same relative accuracy into this one.
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Sketches must share the same relative accuracy to merge")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def bins(self) -> tuple:
+        """
+        Bucket representative values in ascending order, with their counts.
+        """
+        def represent(keys):
+            return 2 * self.gamma ** np.array(keys, dtype=float) / (self.gamma + 1)
+
+        neg_keys = sorted(self.negative, reverse=True)
+        pos_keys = sorted(self.positive)
+        values = np.concatenate([-represent(neg_keys), [0.0], represent(pos_keys)])
+        counts = np.concatenate([
+            [self.negative[k] for k in neg_keys],
+            [self.zero_count],
+            [self.positive[k] for k in pos_keys],
+        ]).astype(np.int64)
+        keep = counts > 0
+        return values[keep], counts[keep]
+
+    def quantile(self, q: float) -> float:
+        values, counts = self.bins()
+        rank = q * (self.count - 1)
+        return values[np.searchsorted(np.cumsum(counts), rank, side="right")]
+
+
+class StreamingGroupsAnalysis:
+    """
+    Out-of-core counterpart of IndependentGroupsAnalysis for groups too large
+    to hold in memory, e.g. read straight from check_marts.db.
+
+    Each group is consumed in chunks into single-pass accumulators: running
+    moments (mean, variance, skew, kurtosis, min, max) and a quantile sketch.
+    From those:
+    - Welch's t-test and Cohen's d are exact
+    - medians are within the sketch's relative accuracy
+    - Mann-Whitney U and Cliff's Delta are approximate, using the sketch
+      buckets as a shared rank histogram (values in one bucket count as ties)
+
+    Accumulators from separate partitions combine with `merge`.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, alpha: float = 0.05):
+        self.alpha = alpha
+        self.moments = {"a": RunningMoments(), "b": RunningMoments()}
+        self.sketches = {
+            "a": QuantileSketch(relative_accuracy),
+            "b": QuantileSketch(relative_accuracy),
+        }
+
+    def update(self, group: str, values: np.ndarray) -> None:
+        """
+        Add a chunk of values to group "a" or "b".
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.moments[group].update(values)
+        self.sketches[group].update(values)
+
+    def load_sql(
+        self,
+        conn,
+        query_a: str,
+        query_b: str,
+        value_col: str = None,
+        chunksize: int = 100_000,
+        params_a=None,
+        params_b=None,
+    ) -> None:
+        """
+        Stream both groups from SQL queries in chunks.
+
+        Parameters:
+        - conn: sqlite3.Connection - e.g. to db/check_marts.db
+        - query_a: str - Query returning group A's values
+        - query_b: str - Query returning group B's values
+        - value_col: str - Column holding the values (default: the first column)
+        - chunksize: int - Rows per chunk (default 100,000)
+        - params_a, params_b - Query parameters
+        """
+        for group, query, params in (("a", query_a, params_a), ("b", query_b, params_b)):
+            for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+                column = chunk[value_col] if value_col else chunk.iloc[:, 0]
+                self.update(group, pd.to_numeric(column, errors="coerce").to_numpy(dtype=float))
+
+    def merge(self, other: "StreamingGroupsAnalysis") -> None:
+        """
+        Combine the accumulators of another analysis (e.g. another partition).
+        """
+        for group in ("a", "b"):
+            self.moments[group].merge(other.moments[group])
+            self.sketches[group].merge(other.sketches[group])
+
+    @property
+    def mean_a(self) -> float:
+        return self.moments["a"].mean
+
+    @property
+    def mean_b(self) -> float:
+        return self.moments["b"].mean
+
+    @property
+    def median_a(self) -> float:
+        return self.sketches["a"].quantile(0.5)
+
+    @property
+    def median_b(self) -> float:
+        return self.sketches["b"].quantile(0.5)
+
+    def test_groups(self) -> None:
+        """
+        Run Welch's t-test and compute Cohen's d from the running moments.
+        """
+        a, b = self.moments["a"], self.moments["b"]
+        self.t_stat, self.p_value = welch_from_moments(
+            a.mean, a.variance, a.n, b.mean, b.variance, b.n
+        )
+        self.pooled_std = np.sqrt((a.variance + b.variance) / 2)
+        self.cohen_d_effect_size = round((a.mean - b.mean) / self.pooled_std, 3)
+
+    def test_non_parametric_groups(self) -> None:
+        """
+        Approximate the Mann-Whitney U test and Cliff's Delta from the sketches.
+        """
+        values_a, counts_a = self.sketches["a"].bins()
+        values_b, counts_b = self.sketches["b"].bins()
+
+        # Align both rank histograms on the union of their buckets
+        values, inverse = np.unique(np.concatenate([values_a, values_b]), return_inverse=True)
+        hist_a = np.bincount(inverse[: len(values_a)], weights=counts_a, minlength=len(values))
+        hist_b = np.bincount(inverse[len(values_a):], weights=counts_b, minlength=len(values))
+
+        b_below = np.cumsum(hist_b) - hist_b
+        n_a, n_b = hist_a.sum(), hist_b.sum()
+        self.mu_U = np.sum(hist_a * (b_below + 0.5 * hist_b))
+        tied = hist_a + hist_b
+        self.p_value = mannwhitney_normal_p_value(self.mu_U, n_a, n_b, np.sum(tied**3 - tied))
+        self.cliff_delta_effect_size = round((2 * self.mu_U - n_a * n_b) / (n_a * n_b), 3)
+
+    def summarise(self) -> None:
+        """
+        Print a summary of the test and effect size results.
+        """
+        print("=" * 60)
+        print(f"Group A mean: {self.mean_a:.3f} | Group B mean: {self.mean_b:.3f}")
+        if hasattr(self, "t_stat"):
+            print(f"t-statistic: {self.t_stat:.3f}")
+            print(f"Cohen's d (effect size): {self.cohen_d_effect_size}")
+        else:
+            print(f"U-statistic (approx.): {self.mu_U:.3f}")
+            print(f"Cliff's Delta (effect size, approx.): {self.cliff_delta_effect_size}")
+
+        if self.p_value < self.alpha:
+            print("✅ Statistically significant difference between groups.")
+        else:
+            print("❌ No statistically significant difference between groups.")
+        print("=" * 60)
+
+    def describe(self) -> None:
+        """
+        Print descriptive statistics for both groups from the accumulators.
+        """
+        print("Descriptive Statistics:\n" + "=" * 60)
+        for label, group in zip(["Group A", "Group B"], ["a", "b"]):
+            moments = self.moments[group]
+            print(f"{label}:")
+            print(f"  Min      : {moments.min:.3f}")
+            print(f"  Max      : {moments.max:.3f}")
+            print(f"  n        : {moments.n:.3f}")
+            print(f"  Mean     : {moments.mean:.3f}")
+            print(f"  Median   : {self.sketches[group].quantile(0.5):.3f}")
+            print(f"  Std Dev  : {np.sqrt(moments.variance):.3f}")
+            print(f"  Skew     : {moments.skew:.3f}")
+            print(f"  Kurtosis : {moments.kurtosis:.3f}")
+            print("-" * 60)
+
+    def results(self) -> dict:
+        """
+        Return a dictionary of the Welch's t-test results.
+        """
+        return {
+            "t_statistic": self.t_stat,
+            "p_value": self.p_value,
+            "cohen_d": self.cohen_d_effect_size,
+            "mean_group_a": self.mean_a,
+            "mean_group_b": self.mean_b,
+        }
+
+    def results_mu(self) -> dict:
+        """
+        Return a dictionary of the (approximate) Mann-Whitney results.
+        """
+        return {
+            "mannwhitney_u": self.mu_U,
+            "p_value": self.p_value,
+            "cliffs_delta": self.cliff_delta_effect_size,
+            "median_group_a": self.median_a,
+            "median_group_b": self.median_b,
+        }